@@ -108,9 +108,10 @@ def build_tree_from_index(repo, index):
     
     Creates a tree structure matching the index, handling nested directories.
     """
-    from collections import defaultdict
-    
-    trees = defaultdict(Tree)
+    trees = {'': Tree()}
+    # Directory paths bucketed by depth, so subtrees can be written
+    # deepest first without sorting
+    by_depth = [['']]
     
     for path in sorted(index.entries.keys()):
         entry = index.entries[path]
@@ -118,7 +119,11 @@ def build_tree_from_index(repo, index):
         
         for i in range(len(parts)):
             dir_path = str(Path(*parts[:i])) if i > 0 else ''
-            trees[dir_path]
+            if dir_path not in trees:
+                trees[dir_path] = Tree()
+                if i == len(by_depth):
+                    by_depth.append([])
+                by_depth[i].append(dir_path)
         
         dir_path = str(Path(*parts[:-1])) if len(parts) > 1 else ''
         filename = parts[-1]
@@ -126,8 +131,8 @@ def build_tree_from_index(repo, index):
         mode = '100755' if entry.mode & 0o111 else '100644'
         trees[dir_path].add_entry(mode, 'blob', entry.sha1, filename)
     
-    for dir_path in sorted(trees.keys(), key=lambda x: x.count('/'), reverse=True):
-        if dir_path:
+    for depth in range(len(by_depth) - 1, 0, -1):
+        for dir_path in by_depth[depth]:
             tree = trees[dir_path]
             tree_hash = repo.write_object(tree)
             
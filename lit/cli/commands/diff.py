@@ -1,5 +1,6 @@
 """Diff command - show changes between commits, working tree, and index."""
 
+import sys
 import click
 from lit.core.repository import Repository
 from lit.cli.output import success, error, info, warning
@@ -130,8 +131,7 @@ def diff_cmd(staged, no_color, commit1, commit2):
             click.echo(info("No changes to display"))
             return
         
-        output = diff_engine.format_diff(diffs, color=use_color)
-        click.echo(output)
+        diff_engine.format_diff(diffs, color=use_color and sys.stdout.isatty(), out=sys.stdout)
         
     except click.Abort:
         raise
@@ -1,5 +1,6 @@
 """Show command - display commit details with diff."""
 
+import sys
 import click
 from datetime import datetime
 from lit.core.repository import Repository
@@ -128,8 +129,7 @@ def show_cmd(no_color, stat, commit):
             click.echo(summary)
         else:
             # Show full diff
-            output = diff_engine.format_diff(diffs, color=use_color)
-            click.echo(output)
+            diff_engine.format_diff(diffs, color=use_color and sys.stdout.isatty(), out=sys.stdout)
         
     except click.Abort:
         raise
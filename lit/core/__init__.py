@@ -19,6 +19,7 @@ from lit.core.hash import hash_object, hash_file
 from lit.core.index import Index, IndexEntry
 from lit.core.refs import RefManager
 from lit.core.config import Config, get_config
+from lit.core.commit_graph import CommitGraph
 
 __all__ = [
     'LitObject',
@@ -32,6 +33,7 @@ __all__ = [
     'RefManager',
     'Config',
     'get_config',
+    'CommitGraph',
     'hash_object',
     'hash_file',
 ]
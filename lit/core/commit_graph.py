@@ -0,0 +1,180 @@
+"""Commit-graph cache for Lit.
+
+Stores each commit's parents, generation number and committer time in a
+packed binary file (.lit/commit-graph) so history walks can order and
+traverse commits without inflating commit objects from the object store.
+"""
+
+import os
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from .objects import Commit
+
+
+# File header: magic, format version, record count
+_HEADER = struct.Struct('<4sII')
+_MAGIC = b'LCGR'
+_VERSION = 1
+
+# Record: commit hash, generation, committer time, parent count;
+# followed by parent_count raw 20-byte parent hashes
+_RECORD = struct.Struct('<20sIqH')
+_HASH_SIZE = 20
+
+# (parents, generation, committer_time)
+GraphEntry = Tuple[Tuple[str, ...], int, int]
+
+
+class CommitGraph:
+    """
+    Cached parents, generation numbers and commit times.
+    
+    The generation number of a commit is 1 for a root commit and otherwise
+    one more than the largest generation of its parents, so a commit
+    always has a higher generation than any of its ancestors.
+    
+    Commits missing from the file are read from the object store once and
+    added; call save() to write new entries back.
+    """
+    
+    FILE_NAME = 'commit-graph'
+    
+    def __init__(self, repo):
+        """
+        Initialize commit graph.
+        
+        Args:
+            repo: Repository instance
+        """
+        self.repo = repo
+        self.path = repo.lit_dir / self.FILE_NAME
+        self._entries: Optional[Dict[str, GraphEntry]] = None
+        self._dirty = False
+    
+    def parents(self, commit_hash: str) -> Tuple[str, ...]:
+        """Parent hashes of a commit (empty if it cannot be read)."""
+        return self._entry(commit_hash)[0]
+    
+    def generation(self, commit_hash: str) -> int:
+        """Generation number of a commit (0 if it cannot be read)."""
+        return self._entry(commit_hash)[1]
+    
+    def commit_time(self, commit_hash: str) -> int:
+        """Committer timestamp of a commit (0 if it cannot be read)."""
+        return self._entry(commit_hash)[2]
+    
+    def save(self) -> None:
+        """Write the graph to disk if new commits were added."""
+        if not self._dirty:
+            return
+        
+        parts = [_HEADER.pack(_MAGIC, _VERSION, len(self._entries))]
+        for commit_hash, (parents, generation, commit_time) in self._entries.items():
+            parts.append(_RECORD.pack(bytes.fromhex(commit_hash), generation, commit_time, len(parents)))
+            parts.extend(bytes.fromhex(parent) for parent in parents)
+        
+        tmp_path = self.path.with_name(self.FILE_NAME + '.tmp')
+        try:
+            tmp_path.write_bytes(b''.join(parts))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # The graph is only a cache
+            return
+        
+        self._dirty = False
+    
+    def _load(self) -> Dict[str, GraphEntry]:
+        """Parse the graph file, starting empty if it is missing or invalid."""
+        entries = {}
+        
+        try:
+            data = self.path.read_bytes()
+            magic, version, count = _HEADER.unpack_from(data, 0)
+            if magic != _MAGIC or version != _VERSION:
+                return entries
+            
+            offset = _HEADER.size
+            for _ in range(count):
+                raw_hash, generation, commit_time, parent_count = _RECORD.unpack_from(data, offset)
+                offset += _RECORD.size
+                # Interned, so a hash shared by many parent lists is one
+                # object and set lookups during walks match by identity
+                parents = tuple(
+                    sys.intern(data[start:start + _HASH_SIZE].hex())
+                    for start in range(offset, offset + parent_count * _HASH_SIZE, _HASH_SIZE)
+                )
+                offset += parent_count * _HASH_SIZE
+                entries[sys.intern(raw_hash.hex())] = (parents, generation, commit_time)
+        except (OSError, struct.error):
+            return {}
+        
+        return entries
+    
+    def _entry(self, commit_hash: str) -> GraphEntry:
+        """Look up a commit, computing it (and missing ancestors) on a miss."""
+        if self._entries is None:
+            self._entries = self._load()
+        
+        entry = self._entries.get(commit_hash)
+        if entry is not None:
+            return entry
+        
+        # Generations depend on the parents' ones: walk down until known
+        # commits are reached, then fill in on the way back up
+        pending: Dict[str, Tuple[Tuple[str, ...], int]] = {}
+        stack: List[str] = [commit_hash]
+        unreadable = ((), 0, 0)
+        # Unreadable commits and every commit above one: their generation
+        # is only a lower bound until the missing objects show up
+        incomplete = set()
+        
+        while stack:
+            current = stack[-1]
+            if current in self._entries:
+                stack.pop()
+                continue
+            
+            if current not in pending:
+                pending[current] = self._read_commit(current)
+            parents, commit_time = pending[current]
+            
+            missing = [p for p in parents or () if p not in self._entries and p not in pending]
+            if missing:
+                stack.extend(missing)
+                continue
+            
+            stack.pop()
+            if parents is None:
+                # Not stored: the commit could appear later
+                self._entries[current] = unreadable
+                incomplete.add(current)
+                continue
+            
+            generation = 1 + max(
+                (self._entries.get(p, unreadable)[1] for p in parents), default=0
+            )
+            self._entries[current] = (parents, generation, commit_time)
+            if incomplete.intersection(parents):
+                incomplete.add(current)
+            else:
+                self._dirty = True
+        
+        entry = self._entries.get(commit_hash, unreadable)
+        
+        # Incomplete entries were only placeholders for the walk
+        for current in incomplete:
+            del self._entries[current]
+        
+        return entry
+    
+    def _read_commit(self, commit_hash: str) -> Tuple[Optional[Tuple[str, ...]], int]:
+        """Read (parents, committer_time) from the object store."""
+        try:
+            commit = self.repo.read_object(commit_hash)
+        except Exception:
+            return None, 0
+        if not isinstance(commit, Commit):
+            return None, 0
+        return tuple(map(sys.intern, commit.parents)), commit.committer_time or 0
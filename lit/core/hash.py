@@ -1,6 +1,12 @@
 """Hash utilities for Lit."""
 
 import hashlib
+import mmap
+import os
+
+
+# Files at least this large are hashed through a read-only memory map
+MMAP_THRESHOLD = 256 * 1024
 
 
 def hash_object(data: bytes) -> str:
@@ -27,4 +33,16 @@ def hash_file(filepath: str) -> str:
         40-character hex string
     """
     with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        
+        # Hash large files straight from the page cache without copying
+        # them into a bytes object; sha1 releases the GIL on big buffers
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha1(mapped).hexdigest()
+        
+        # Python 3.11+ hashes the file with a reusable buffer
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha1').hexdigest()
+        
         return hash_object(f.read())
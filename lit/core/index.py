@@ -111,8 +111,47 @@ class Index:
             str: SHA-1 hash of staged content
         """
         from .objects import Blob
-        import os
         
+        file_path = self._resolve_file(repo, filepath)
+        blob = Blob.from_file(str(file_path))
+        sha1 = repo.write_object(blob)
+        self._add_stat_entry(repo, file_path, sha1)
+        
+        # Auto-persist to disk (like lit add)
+        if hasattr(repo, 'index_file'):
+            self.write(str(repo.index_file))
+        
+        return sha1
+    
+    def add_files(self, repo, filepaths: List[str]) -> List[str]:
+        """
+        Stage several files for commit.
+        
+        Like add_file for each path, but the blobs are written in one
+        bulk object write and the index is persisted once at the end.
+        
+        Args:
+            repo: Repository instance
+            filepaths: Paths to files (absolute or relative)
+            
+        Returns:
+            List of SHA-1 hashes of the staged contents, in order
+        """
+        from .objects import Blob
+        
+        file_paths = [self._resolve_file(repo, filepath) for filepath in filepaths]
+        hashes = repo.write_objects_bulk(Blob.from_file(str(path)) for path in file_paths)
+        for file_path, sha1 in zip(file_paths, hashes):
+            self._add_stat_entry(repo, file_path, sha1)
+        
+        # Auto-persist to disk (like lit add)
+        if hasattr(repo, 'index_file'):
+            self.write(str(repo.index_file))
+        
+        return hashes
+    
+    def _resolve_file(self, repo, filepath: str) -> Path:
+        """Resolve a path to stage against the work tree and check it is a file."""
         file_path = Path(filepath)
         
         if not file_path.is_absolute():
@@ -124,9 +163,10 @@ class Index:
         if not file_path.is_file():
             raise ValueError(f"Not a file: {filepath}")
         
-        blob = Blob.from_file(str(file_path))
-        sha1 = repo.write_object(blob)
-        
+        return file_path
+    
+    def _add_stat_entry(self, repo, file_path: Path, sha1: str) -> None:
+        """Add an entry for a staged file from its current stat data."""
         stat = file_path.stat()
         rel_path = str(file_path.relative_to(repo.work_tree))
         
@@ -144,12 +184,6 @@ class Index:
             uid=stat.st_uid,
             gid=stat.st_gid
         )
-        
-        # Auto-persist to disk (like lit add)
-        if hasattr(repo, 'index_file'):
-            self.write(str(repo.index_file))
-        
-        return sha1
     
     def remove_entry(self, path: str, repo=None) -> None:
         """
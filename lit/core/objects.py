@@ -1,7 +1,7 @@
 """Lit objects for Lit."""
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Optional, Tuple
 from .hash import hash_object
 
 
@@ -52,11 +52,24 @@ class LitObject(ABC):
             str: 40-character SHA-1 hash
         """
         if self._hash is None:
-            data = self.serialize()
-            header = f"{self.type} {len(data)}\0".encode()
-            self._hash = hash_object(header + data)
+            self._header_and_data()
         return self._hash
     
+    def _header_and_data(self) -> Tuple[str, bytes]:
+        """
+        Serialize object with its header and refresh the cached hash.
+        
+        Lets callers that need both the hash and the stored bytes (such as
+        Repository.write_object) serialize the object only once.
+        
+        Returns:
+            Tuple of (hash, header + serialized data)
+        """
+        data = self.serialize()
+        content = f"{self.type} {len(data)}\0".encode() + data
+        self._hash = hash_object(content)
+        return self._hash, content
+    
     @property
     def hash(self) -> str:
         """
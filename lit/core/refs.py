@@ -26,10 +26,10 @@ class RefManager:
         """
         self.repo = repo
         self.lit_dir = repo.lit_dir
-        self.refs_dir = self.lit_dir / 'refs'
-        self.heads_dir = self.refs_dir / 'heads'
-        self.tags_dir = self.refs_dir / 'tags'
-        self.head_file = self.lit_dir / 'HEAD'
+        self.refs_dir = repo.refs_dir
+        self.heads_dir = repo.heads_dir
+        self.tags_dir = repo.tags_dir
+        self.head_file = repo.head_file
     
     def read_ref(self, ref_name: str) -> Optional[str]:
         """
@@ -170,6 +170,28 @@ class RefManager:
         # Detached HEAD
         return None
     
+    def head_state(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Get the current branch and the commit HEAD resolves to.
+        
+        Reads HEAD once, for callers that need both.
+        
+        Returns:
+            Tuple of (branch name or None if detached, commit hash or None)
+        """
+        try:
+            content = self.head_file.read_text().strip()
+        except FileNotFoundError:
+            return None, None
+        
+        if content.startswith('ref: '):
+            ref_name = content[5:]
+            branch = ref_name[len('refs/heads/'):] if ref_name.startswith('refs/heads/') else None
+            return branch, self.read_ref(ref_name)
+        
+        # Detached HEAD
+        return None, content
+    
     def is_detached_head(self) -> bool:
         """
         Check if HEAD is in detached state.
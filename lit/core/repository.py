@@ -1,11 +1,44 @@
 """Repository management for Lit VCS."""
 
+import hashlib
+import mmap
 import os
-import zlib
+import stat
+import tempfile
+from functools import cached_property
+from itertools import groupby
 from pathlib import Path
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
+from .hash import MMAP_THRESHOLD
 from .objects import LitObject, Blob, Tree, Commit
 
+# Prefer ISA-L's SIMD DEFLATE implementation when installed; it produces
+# standard zlib streams, so repositories stay readable either way
+try:
+    from isal import isal_zlib as _zlib
+except ImportError:
+    import zlib as _zlib
+
+
+# read_object inflates at most this many bytes, from the first
+# _HEADER_PROBE_INPUT compressed bytes, to find the object header
+_HEADER_PROBE_SIZE = 64
+_HEADER_PROBE_INPUT = 1024
+
+# Size of uncompressed chunks write_blob_file feeds to the compressor
+_WRITE_CHUNK_SIZE = 1024 * 1024
+
+# Loose objects are written at level 1 like Git: several times faster than
+# the default level 6 for only a slightly larger file
+_COMPRESSION_LEVEL = 1
+
+# Upper bound on reader threads used by read_objects_bulk
+_MAX_READ_WORKERS = 32
+
+# Loose object file names: the hash minus its two-digit fanout directory
+_OBJECT_NAME_LENGTH = 38
+
 
 class Repository:
     """
@@ -22,22 +55,86 @@ class Repository:
         Args:
             path: Path to repository root (defaults to current directory)
         """
-        self.work_tree = Path(path).resolve()
+        self._setup(Path(path).resolve())
+    
+    @classmethod
+    def _from_resolved(cls, work_tree: Path) -> 'Repository':
+        """
+        Create a repository for a work tree path that is already resolved.
+        
+        Skips the resolve() call in __init__, which stats every component
+        of the path.
+        
+        Args:
+            work_tree: Absolute, resolved path to repository root
+            
+        Returns:
+            Repository: New repository instance
+        """
+        repo = cls.__new__(cls)
+        repo._setup(work_tree)
+        return repo
+    
+    def _setup(self, work_tree: Path) -> None:
+        """Set up repository paths and lazy managers for a resolved work tree."""
+        self.work_tree = work_tree
         self.lit_dir = self.work_tree / '.lit'
-        self.objects_dir = self.lit_dir / 'objects'
-        self.refs_dir = self.lit_dir / 'refs'
-        self.heads_dir = self.refs_dir / 'heads'
-        self.tags_dir = self.refs_dir / 'tags'
-        self.remotes_dir = self.refs_dir / 'remotes'
-        self.head_file = self.lit_dir / 'HEAD'
-        self.index_file = self.lit_dir / 'index'
-        self.config_file = self.lit_dir / 'config'
         
         # Initialize managers (lazy loading to avoid circular import)
         self._ref_manager = None
         self._diff_engine = None
         self._merge_engine = None
         self._remote_manager = None
+        
+        # Set of hashes in the object database, from the last full scan
+        self._object_index: Optional[Set[str]] = None
+        
+        # Hashes this instance has written or found on disk, so repeated
+        # writes of the same content skip the disk probe even before the
+        # full index is built
+        self._known_objects: Set[str] = set()
+    
+    # Paths inside .lit are built on first use; most commands touch only
+    # a few of them
+    @cached_property
+    def objects_dir(self) -> Path:
+        """Path to the object database."""
+        return self.lit_dir / 'objects'
+    
+    @cached_property
+    def refs_dir(self) -> Path:
+        """Path to the refs directory."""
+        return self.lit_dir / 'refs'
+    
+    @cached_property
+    def heads_dir(self) -> Path:
+        """Path to branch references."""
+        return self.refs_dir / 'heads'
+    
+    @cached_property
+    def tags_dir(self) -> Path:
+        """Path to tag references."""
+        return self.refs_dir / 'tags'
+    
+    @cached_property
+    def remotes_dir(self) -> Path:
+        """Path to remote-tracking references."""
+        return self.refs_dir / 'remotes'
+    
+    @cached_property
+    def head_file(self) -> Path:
+        """Path to the HEAD file."""
+        return self.lit_dir / 'HEAD'
+    
+    @cached_property
+    def index_file(self) -> Path:
+        """Path to the index file."""
+        return self.lit_dir / 'index'
+    
+    @cached_property
+    def config_file(self) -> Path:
+        """Path to the repository config file."""
+        return self.lit_dir / 'config'
     
     @property
     def refs(self):
@@ -126,18 +223,23 @@ class Repository:
         Returns:
             Repository if found, None otherwise
         """
-        current = Path(path).resolve()
+        # Resolve once up front; parents of a resolved path are resolved too,
+        # so the walk itself only needs string operations and one stat per level
+        current = os.path.realpath(path)
         
         while True:
-            lit_dir = current / '.lit'
-            if lit_dir.is_dir():
-                return cls(str(current))
+            try:
+                if stat.S_ISDIR(os.stat(os.path.join(current, '.lit')).st_mode):
+                    return cls._from_resolved(Path(current))
+            except OSError:
+                pass
             
             # Reached filesystem root
-            if current == current.parent:
+            parent = os.path.dirname(current)
+            if parent == current:
                 return None
             
-            current = current.parent
+            current = parent
     
     def object_path(self, hash: str) -> Path:
         """
@@ -168,25 +270,133 @@ class Repository:
         Returns:
             str: SHA-1 hash of the object
         """
-        hash = obj.hash
-        path = self.object_path(hash)
+        # Skip serializing entirely if the object's hash is already known
+        # and the object is stored
+        if obj._hash is not None and self._has_stored_object(obj._hash):
+            return obj._hash
         
-        # Object already exists
-        if path.exists():
+        # Serialize once and derive the hash from the same bytes
+        hash, content = obj._header_and_data()
+        if self._has_stored_object(hash):
             return hash
         
-        # Prepare data with header
-        data = obj.serialize()
-        header = f"{obj.type} {len(data)}\0".encode()
-        content = header + data
-        
         # Compress and write
-        compressed = zlib.compress(content)
+        compressed = _zlib.compress(content, _COMPRESSION_LEVEL)
+        path = self.object_path(hash)
         path.parent.mkdir(parents=True, exist_ok=True)
         path.write_bytes(compressed)
         
+        self._remember_object(hash)
+        
         return hash
     
+    def write_objects_bulk(self, objects: Iterable[LitObject]) -> List[str]:
+        """
+        Write many objects at once.
+        
+        Every object is serialized and hashed first; the ones not stored
+        yet are then written in hash order, grouped by fanout directory so that each
+        directory is created once. Duplicates are written only once.
+        
+        Args:
+            objects: Lit objects to write
+            
+        Returns:
+            List of object hashes, in the order of objects
+        """
+        hashes = []
+        pending = {}
+        
+        for obj in objects:
+            # Like write_object: skip serializing objects known to be stored,
+            # otherwise serialize once for both the hash and the content
+            if obj._hash is not None and self._has_stored_object(obj._hash):
+                hashes.append(obj._hash)
+                continue
+            
+            hash, content = obj._header_and_data()
+            hashes.append(hash)
+            if hash not in pending and not self._has_stored_object(hash):
+                pending[hash] = content
+        
+        for fanout, group in groupby(sorted(pending.items()), key=lambda item: item[0][:2]):
+            directory = self.objects_dir / fanout
+            directory.mkdir(parents=True, exist_ok=True)
+            for hash, content in group:
+                (directory / hash[2:]).write_bytes(_zlib.compress(content, _COMPRESSION_LEVEL))
+                self._remember_object(hash)
+        
+        return hashes
+    
+    def write_blob_file(self, filepath: str) -> str:
+        """
+        Write a file's content as a blob object.
+        
+        Files of at least MMAP_THRESHOLD bytes are hashed through a
+        read-only memory map and, unless the blob is already stored,
+        compressed from it in chunks into a temporary file that is then
+        moved into place. Their content is never copied into one bytes
+        object.
+        
+        Args:
+            filepath: Path to file
+        
+        Returns:
+            str: SHA-1 hash of the blob
+        """
+        with open(filepath, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < MMAP_THRESHOLD:
+                return self.write_object(Blob(f.read()))
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                hasher = hashlib.sha1(f"blob {size}\0".encode())
+                hasher.update(mapped)
+                hash = hasher.hexdigest()
+                if self._has_stored_object(hash):
+                    return hash
+                
+                path = self.object_path(hash)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'wb') as out:
+                        compressor = _zlib.compressobj(_COMPRESSION_LEVEL)
+                        out.write(compressor.compress(f"blob {size}\0".encode()))
+                        for start in range(0, size, _WRITE_CHUNK_SIZE):
+                            out.write(compressor.compress(mapped[start:start + _WRITE_CHUNK_SIZE]))
+                        out.write(compressor.flush())
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+        
+        self._remember_object(hash)
+        
+        return hash
+    
+    def _has_stored_object(self, hash: str) -> bool:
+        """
+        Check for an object without triggering a full index scan.
+        
+        Objects written by another process (or Repository instance) after
+        the index was built are not in it yet, so misses are confirmed on disk.
+        """
+        if hash in self._known_objects:
+            return True
+        if self._object_index is not None and hash in self._object_index:
+            return True
+        if self.object_path(hash).exists():
+            self._remember_object(hash)
+            return True
+        return False
+    
+    def _remember_object(self, hash: str) -> None:
+        """Record a hash as stored in the object database."""
+        self._known_objects.add(hash)
+        if self._object_index is not None:
+            self._object_index.add(hash)
+    
     def read_object(self, hash: str) -> LitObject:
         """
         Read object from repository.
@@ -205,14 +415,17 @@ class Repository:
         if not path.exists():
             raise Exception(f"Object {hash} not found")
         
-        # Read and decompress
-        compressed = path.read_bytes()
-        content = zlib.decompress(compressed)
+        with open(path, 'rb') as f:
+            compressed = f.read()
         
         # Parse header: <type> <size>\0
-        null_idx = content.index(b'\0')
-        header = content[:null_idx].decode()
-        data = content[null_idx + 1:]
+        probe = _zlib.decompressobj().decompress(
+            memoryview(compressed)[:_HEADER_PROBE_INPUT], _HEADER_PROBE_SIZE
+        )
+        null_idx = probe.find(b'\0')
+        if null_idx == -1:
+            raise Exception(f"Invalid object header in {hash}")
+        header = probe[:null_idx].decode()
         
         try:
             obj_type, size_str = header.split(' ', 1)
@@ -220,6 +433,15 @@ class Repository:
         except ValueError:
             raise Exception(f"Invalid object header: {header}")
         
+        # Inflate the header alone, then the content into one output buffer
+        # of the size the header gives, which becomes the object's data
+        # without being copied again. Only the input not yet inflated is
+        # kept while the content is inflated
+        decompressor = _zlib.decompressobj()
+        decompressor.decompress(compressed, null_idx + 1)
+        del compressed
+        data = decompressor.flush(max(size, 1))
+        
         # Verify size
         if len(data) != size:
             raise Exception(f"Object size mismatch: expected {size}, got {len(data)}")
@@ -237,17 +459,96 @@ class Repository:
         obj.deserialize(data)
         return obj
     
+    def read_objects_bulk(self, hashes: Iterable[str]) -> Dict[str, LitObject]:
+        """
+        Read many objects at once.
+        
+        File reads and zlib inflation release the GIL, so the objects are
+        read on a thread pool. Duplicate hashes are read only once.
+        
+        Args:
+            hashes: Object hashes to read
+            
+        Returns:
+            Dict of {hash: object}; hashes that cannot be read are left out
+        """
+        wanted = set(hashes)
+        
+        def read(hash):
+            try:
+                return hash, self.read_object(hash)
+            except Exception:
+                return hash, None
+        
+        if len(wanted) <= 1:
+            results = map(read, wanted)
+        else:
+            with ThreadPoolExecutor(max_workers=min(_MAX_READ_WORKERS, len(wanted))) as pool:
+                results = list(pool.map(read, wanted))
+        
+        return {hash: obj for hash, obj in results if obj is not None}
+    
+    def stored_objects(self) -> Set[str]:
+        """
+        Scan the object database and return every stored hash.
+        
+        Uses os.scandir over the fanout directories. The result also
+        becomes the index that answers later checks of a batch, so those
+        are set lookups instead of one stat() per object.
+        
+        Returns:
+            Set of 40-character SHA-1 hashes
+        """
+        index = set()
+        
+        try:
+            with os.scandir(self.objects_dir) as fanout:
+                for subdir in fanout:
+                    if len(subdir.name) != 2 or not subdir.is_dir():
+                        continue
+                    with os.scandir(subdir.path) as objects:
+                        # Full hashes only: skips temporary files of
+                        # interrupted writes
+                        index.update(
+                            subdir.name + obj.name for obj in objects
+                            if len(obj.name) == _OBJECT_NAME_LENGTH
+                        )
+        except FileNotFoundError:
+            pass
+        
+        self._object_index = index
+        return index
+    
     def object_exists(self, hash: str) -> bool:
         """
         Check if object exists in repository.
         
+        A single check is one stat() at most; use missing_objects to check
+        many hashes at once.
+        
         Args:
             hash: 40-character SHA-1 hash
             
         Returns:
             bool: True if object exists
         """
-        return self.object_path(hash).exists()
+        return self._has_stored_object(hash)
+    
+    def missing_objects(self, hashes: Iterable[str]) -> List[str]:
+        """
+        Find which of many objects are not in the repository.
+        
+        The object database is scanned once for the batch, so each check
+        is a set lookup and misses are not confirmed on disk.
+        
+        Args:
+            hashes: 40-character SHA-1 hashes
+            
+        Returns:
+            List of the hashes that are not stored, in the order given
+        """
+        index = self.stored_objects()
+        return [hash for hash in hashes if hash not in index]
     
     def __repr__(self) -> str:
         """String representation of repository."""
@@ -1,23 +1,91 @@
 """Diff engine for comparing files and trees."""
 
-from typing import List, Tuple, Optional
-from difflib import unified_diff
-from pathlib import Path
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Optional, Dict, Iterator, Set, TextIO
+
+from colorama import Fore, Style
+
+from lit.core.hash import hash_file
+from lit.core.index import Index
+from lit.core.objects import Commit, Tree
+from lit.operations.myers import myers_diff, group_opcodes
+
+
+# Stat data -> content hash cache for working tree files, inside .lit
+STAT_CACHE_FILE = 'stat-cache.json'
+
+# Files modified this recently are not cached (racy timestamp guard)
+RACY_WINDOW_NS = 2 * 10**9
+
+# ANSI codes used by format_diff, bound once
+_C_CYAN = Fore.CYAN
+_C_GREEN = Fore.GREEN
+_C_RED = Fore.RED
+_C_RESET = Style.RESET_ALL
+
+# diff_trees spreads per-file diffs over threads above this many files
+PARALLEL_DIFF_THRESHOLD = 8
+
+# Leading bytes searched for a NUL to classify content as binary, like Git
+BINARY_CHECK_SIZE = 8000
+
+
+def _is_binary(content: Optional[bytes]) -> bool:
+    """Check whether content looks binary (a NUL byte near the start)."""
+    return content is not None and b'\0' in content[:BINARY_CHECK_SIZE]
 
 
 class DiffHunk:
-    """Represents a single hunk (continuous block of changes) in a diff."""
+    """
+    Represents a single hunk (continuous block of changes) in a diff.
+    
+    Lines are kept as raw bytes in one buffer separated by newlines rather
+    than as a list of separate str objects; the lines property decodes them
+    (invalid UTF-8 replaced) on use.
+    """
+    
+    __slots__ = ('old_start', 'old_count', 'new_start', 'new_count', '_buf', '_count')
     
     def __init__(self, old_start: int, old_count: int, new_start: int, new_count: int):
         self.old_start = old_start
         self.old_count = old_count
         self.new_start = new_start
         self.new_count = new_count
-        self.lines = []
+        self._buf = bytearray()
+        self._count = 0
+    
+    @property
+    def lines(self) -> List[str]:
+        """Diff lines of this hunk, each starting with ' ', '+' or '-'."""
+        if not self._count:
+            return []
+        return self.text.split('\n')
+    
+    @lines.setter
+    def lines(self, lines: List[str]):
+        lines = list(lines)
+        self._buf = bytearray('\n'.join(lines).encode('utf-8', 'surrogatepass'))
+        self._count = len(lines)
+    
+    @property
+    def text(self) -> str:
+        """All lines of this hunk joined by newlines."""
+        return self._buf.decode('utf-8', errors='replace')
+    
+    def _set_buffer(self, data: bytes, count: int):
+        """Replace the lines with count newline-separated raw lines."""
+        self._buf = bytearray(data)
+        self._count = count
     
     def add_line(self, line: str):
         """Add a line to this hunk."""
-        self.lines.append(line)
+        if self._count:
+            self._buf += b'\n'
+        self._buf += line.encode('utf-8', 'surrogatepass')
+        self._count += 1
     
     def __str__(self):
         return f"@@ -{self.old_start},{self.old_count} +{self.new_start},{self.new_count} @@"
@@ -26,6 +94,9 @@ class DiffHunk:
 class FileDiff:
     """Represents the diff for a single file."""
     
+    __slots__ = ('path', 'old_content', 'new_content', 'is_new', 'is_deleted', 'is_modified',
+                 'is_binary', 'hunks')
+    
     def __init__(self, path: str, old_content: Optional[bytes], new_content: Optional[bytes]):
         self.path = path
         self.old_content = old_content
@@ -33,70 +104,69 @@ class FileDiff:
         self.is_new = old_content is None
         self.is_deleted = new_content is None
         self.is_modified = old_content is not None and new_content is not None
+        self.is_binary = _is_binary(old_content) or _is_binary(new_content)
         self.hunks = []
     
     def compute_diff(self):
         """Compute diff hunks for this file."""
+        if self.is_binary:
+            # Line hunks are meaningless for binary content
+            return
+        
         if self.is_new:
             # New file - all lines are additions
-            new_lines = self.new_content.decode('utf-8', errors='replace').splitlines(keepends=True)
+            new_lines = self.new_content.splitlines()
             if new_lines:
                 hunk = DiffHunk(0, 0, 1, len(new_lines))
-                for line in new_lines:
-                    hunk.add_line(f"+{line.rstrip()}")
+                hunk._set_buffer(self._prefix_lines(b'+', new_lines), len(new_lines))
                 self.hunks.append(hunk)
         elif self.is_deleted:
             # Deleted file - all lines are deletions
-            old_lines = self.old_content.decode('utf-8', errors='replace').splitlines(keepends=True)
+            old_lines = self.old_content.splitlines()
             if old_lines:
                 hunk = DiffHunk(1, len(old_lines), 0, 0)
-                for line in old_lines:
-                    hunk.add_line(f"-{line.rstrip()}")
+                hunk._set_buffer(self._prefix_lines(b'-', old_lines), len(old_lines))
                 self.hunks.append(hunk)
+        elif self.old_content == self.new_content:
+            # Identical content: one memcmp instead of splitting both sides
+            return
         else:
-            # Modified file - compute actual diff
-            old_lines = self.old_content.decode('utf-8', errors='replace').splitlines(keepends=True)
-            new_lines = self.new_content.decode('utf-8', errors='replace').splitlines(keepends=True)
-            
-            # Use unified_diff from difflib
-            diff_lines = list(unified_diff(
-                old_lines, new_lines,
-                fromfile=f"a/{self.path}",
-                tofile=f"b/{self.path}",
-                lineterm=''
-            ))
+            # Modified file - compute actual diff on the raw lines
+            old_lines = self.old_content.splitlines(keepends=True)
+            new_lines = self.new_content.splitlines(keepends=True)
             
-            if len(diff_lines) > 2:  # Skip if only headers
-                self._parse_unified_diff(diff_lines[2:])  # Skip file headers
+            self._build_hunks(old_lines, new_lines)
     
-    def _parse_unified_diff(self, diff_lines: List[str]):
-        """Parse unified diff output into hunks."""
-        current_hunk = None
-        
-        for line in diff_lines:
-            if line.startswith('@@'):
-                # Parse hunk header
-                # Format: @@ -old_start,old_count +new_start,new_count @@
-                parts = line.split('@@')[1].strip().split()
-                old_part = parts[0][1:]  # Remove '-'
-                new_part = parts[1][1:]  # Remove '+'
-                
-                if ',' in old_part:
-                    old_start, old_count = map(int, old_part.split(','))
-                else:
-                    old_start = int(old_part)
-                    old_count = 1
-                
-                if ',' in new_part:
-                    new_start, new_count = map(int, new_part.split(','))
-                else:
-                    new_start = int(new_part)
-                    new_count = 1
-                
-                current_hunk = DiffHunk(old_start, old_count, new_start, new_count)
-                self.hunks.append(current_hunk)
-            elif current_hunk and (line.startswith('+') or line.startswith('-') or line.startswith(' ')):
-                current_hunk.add_line(line.rstrip())
+    @staticmethod
+    def _prefix_lines(prefix: bytes, lines: List[bytes]) -> bytes:
+        """Prefix and right-strip raw lines and join them into a hunk buffer."""
+        return b'\n'.join([prefix + line.rstrip() for line in lines])
+    
+    def _build_hunks(self, old_lines: List[bytes], new_lines: List[bytes]):
+        """Build hunks with 3 lines of context from a Myers diff of the lines."""
+        for group in group_opcodes(myers_diff(old_lines, new_lines)):
+            i1, i2 = group[0][1], group[-1][2]
+            j1, j2 = group[0][3], group[-1][4]
+            
+            # Same range convention as unified diff: empty ranges start
+            # at the line before
+            old_count = i2 - i1
+            new_count = j2 - j1
+            hunk = DiffHunk(
+                i1 + 1 if old_count else i1, old_count,
+                j1 + 1 if new_count else j1, new_count
+            )
+            
+            lines = []
+            for tag, a1, a2, b1, b2 in group:
+                if tag == 'equal':
+                    lines.extend(b' ' + line.rstrip() for line in old_lines[a1:a2])
+                    continue
+                lines.extend(b'-' + line.rstrip() for line in old_lines[a1:a2])
+                lines.extend(b'+' + line.rstrip() for line in new_lines[b1:b2])
+            
+            hunk._set_buffer(b'\n'.join(lines), len(lines))
+            self.hunks.append(hunk)
 
 
 class DiffEngine:
@@ -117,6 +187,13 @@ class DiffEngine:
             repo: Repository instance
         """
         self.repo = repo
+        
+        # path -> [mtime_ns, size, inode, sha1] for working tree files
+        self._stat_cache: Optional[Dict[str, list]] = None
+        self._stat_cache_dirty = False
+        
+        # tree hash -> {relative_path: blob_hash}, see _tree_files
+        self._tree_files_cache: Dict[str, Dict[str, str]] = {}
     
     def diff_blobs(self, path: str, old_content: Optional[bytes], new_content: Optional[bytes]) -> FileDiff:
         """
@@ -145,39 +222,31 @@ class DiffEngine:
         Returns:
             List of FileDiff objects
         """
-        diffs = []
-        
-        # Find all unique paths
-        all_paths = set(old_tree_files.keys()) | set(new_tree_files.keys())
-        
-        for path in sorted(all_paths):
+        # Only paths whose blob changed need their contents
+        changed = []
+        for path in sorted(set(old_tree_files) | set(new_tree_files)):
             old_hash = old_tree_files.get(path)
             new_hash = new_tree_files.get(path)
-            
-            # Skip if unchanged
-            if old_hash == new_hash:
-                continue
-            
-            # Get blob contents
-            old_content = None
-            if old_hash:
-                try:
-                    old_blob = self.repo.read_object(old_hash)
-                    old_content = old_blob.data
-                except:
-                    pass
-            
-            new_content = None
-            if new_hash:
-                try:
-                    new_blob = self.repo.read_object(new_hash)
-                    new_content = new_blob.data
-                except:
-                    pass
-            
-            # Compute diff
-            diff = self.diff_blobs(path, old_content, new_content)
-            diffs.append(diff)
+            if old_hash != new_hash:
+                changed.append((path, old_hash, new_hash))
+        
+        # Read every needed blob in one batch
+        blobs = self.repo.read_objects_bulk(
+            h for _, old_hash, new_hash in changed for h in (old_hash, new_hash) if h
+        )
+        
+        def diff_path(change):
+            path, old_hash, new_hash = change
+            old_content = getattr(blobs.get(old_hash), 'data', None)
+            new_content = getattr(blobs.get(new_hash), 'data', None)
+            return self.diff_blobs(path, old_content, new_content)
+        
+        # Files diff independently; spread larger change sets over threads
+        if len(changed) > PARALLEL_DIFF_THRESHOLD:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                diffs = list(pool.map(diff_path, changed))
+        else:
+            diffs = [diff_path(change) for change in changed]
         
         return diffs
     
@@ -192,16 +261,14 @@ class DiffEngine:
         Returns:
             List of FileDiff objects
         """
-        from lit.core.objects import Commit, Tree
-        
         # Get old tree
-        old_tree_files = {}
+        old_tree = None
         if old_commit_hash:
             old_commit = self.repo.read_object(old_commit_hash)
             if isinstance(old_commit, Commit):
                 old_tree = self.repo.read_object(old_commit.tree)
-                if isinstance(old_tree, Tree):
-                    old_tree_files = self._get_tree_files(old_tree)
+                if not isinstance(old_tree, Tree):
+                    old_tree = None
         
         # Get new tree
         new_commit = self.repo.read_object(new_commit_hash)
@@ -212,26 +279,120 @@ class DiffEngine:
         if not isinstance(new_tree, Tree):
             return []
         
-        new_tree_files = self._get_tree_files(new_tree)
+        # Initial commit: every file is new, no comparison needed
+        if old_tree is None:
+            return self._diff_added_files(self._tree_files(new_tree.hash, new_tree))
+        
+        # Walk both trees together, collecting only the paths that differ
+        old_tree_files = {}
+        new_tree_files = {}
+        self._collect_tree_changes(old_tree, new_tree, '', old_tree_files, new_tree_files)
         
         return self.diff_trees(old_tree_files, new_tree_files)
     
+    def _diff_added_files(self, files: Dict[str, str]) -> List[FileDiff]:
+        """
+        Build new-file diffs for every path in files.
+        
+        Args:
+            files: Dict of {path: blob_hash}
+        
+        Returns:
+            List of FileDiff objects sorted by path
+        """
+        blobs = self.repo.read_objects_bulk(files.values())
+        return [
+            self.diff_blobs(path, None, getattr(blobs.get(files[path]), 'data', None))
+            for path in sorted(files)
+        ]
+    
+    def _collect_tree_changes(self, old_tree, new_tree, prefix: str,
+                              old_files: dict, new_files: dict) -> None:
+        """
+        Walk two trees in step and record the blobs that differ.
+        
+        Entries with the same name, type and hash are skipped without being
+        read, so unchanged subtrees cost nothing no matter how large they are.
+        
+        Args:
+            old_tree: Old Tree object
+            new_tree: New Tree object
+            prefix: Path prefix of both trees
+            old_files: Dict of {path: blob_hash} filled with old-side changes
+            new_files: Dict of {path: blob_hash} filled with new-side changes
+        """
+        old_entries = {entry.name: entry for entry in old_tree.entries}
+        new_entries = {entry.name: entry for entry in new_tree.entries}
+        
+        for name in old_entries.keys() | new_entries.keys():
+            old_entry = old_entries.get(name)
+            new_entry = new_entries.get(name)
+            
+            if (old_entry is not None and new_entry is not None
+                    and old_entry.hash == new_entry.hash and old_entry.type == new_entry.type):
+                continue
+            
+            path = f"{prefix}{name}"
+            
+            # Both sides are directories: only descend into the differing one
+            if (old_entry is not None and new_entry is not None
+                    and old_entry.type == 'tree' and new_entry.type == 'tree'):
+                old_subtree = self.repo.read_object(old_entry.hash)
+                new_subtree = self.repo.read_object(new_entry.hash)
+                if isinstance(old_subtree, Tree) and isinstance(new_subtree, Tree):
+                    self._collect_tree_changes(old_subtree, new_subtree, f"{path}/",
+                                               old_files, new_files)
+                continue
+            
+            # Added, removed or changed type: take each side whole
+            for entry, files in ((old_entry, old_files), (new_entry, new_files)):
+                if entry is None:
+                    continue
+                if entry.type == 'blob':
+                    files[path] = entry.hash
+                elif entry.type == 'tree':
+                    for sub_path, blob_hash in self._tree_files(entry.hash).items():
+                        files[f"{path}/{sub_path}"] = blob_hash
+    
     def _get_tree_files(self, tree, prefix='') -> dict:
         """Recursively get all files from tree."""
-        from lit.core.objects import Tree
+        files = self._tree_files(tree.hash, tree)
+        if not prefix:
+            return dict(files)
+        return {f"{prefix}{path}": blob_hash for path, blob_hash in files.items()}
+    
+    def _tree_files(self, tree_hash: str, tree=None) -> Dict[str, str]:
+        """
+        Get {relative_path: blob_hash} for a tree, memoized by tree hash.
         
-        files = {}
-        for entry in tree.entries:
-            path = f"{prefix}{entry.name}" if prefix else entry.name
-            
-            if entry.type == 'blob':
-                files[path] = entry.hash
-            elif entry.type == 'tree':
-                subtree = self.repo.read_object(entry.hash)
-                if isinstance(subtree, Tree):
-                    subfiles = self._get_tree_files(subtree, f"{path}/")
-                    files.update(subfiles)
+        Trees are immutable once hashed, so a shared subtree is walked once
+        per engine no matter how many commits or directories contain it.
+        The returned dict is the cached one and must not be modified.
         
+        Args:
+            tree_hash: Hash of the tree
+            tree: Already loaded Tree object, if the caller has one
+        
+        Returns:
+            Dict of {path: blob_hash} relative to the tree
+        """
+        files = self._tree_files_cache.get(tree_hash)
+        if files is not None:
+            return files
+        
+        if tree is None:
+            tree = self.repo.read_object(tree_hash)
+        
+        files = {}
+        if isinstance(tree, Tree):
+            for entry in tree.entries:
+                if entry.type == 'blob':
+                    files[entry.name] = entry.hash
+                elif entry.type == 'tree':
+                    for path, blob_hash in self._tree_files(entry.hash).items():
+                        files[f"{entry.name}/{path}"] = blob_hash
+        
+        self._tree_files_cache[tree_hash] = files
         return files
     
     def diff_working_to_index(self) -> List[FileDiff]:
@@ -241,9 +402,6 @@ class DiffEngine:
         Returns:
             List of FileDiff objects
         """
-        from lit.core.index import Index
-        from lit.core.hash import hash_file
-        
         # Get index
         index = Index()
         index_file = self.repo.index_file
@@ -253,65 +411,156 @@ class DiffEngine:
         index_files = {entry.path: entry.sha1 for entry in index.entries.values()}
         
         # Get working directory files
-        work_tree = self.repo.work_tree
-        working_files = {}
-        
-        for path in work_tree.rglob('*'):
-            if path.is_file():
-                rel_path = path.relative_to(work_tree)
-                
-                if any(part.startswith('.') for part in rel_path.parts):
-                    continue
-                
-                try:
-                    working_files[str(rel_path)] = str(path)
-                except:
-                    pass
-        
-        # Compute diffs
-        diffs = []
-        all_paths = set(index_files.keys()) | set(working_files.keys())
+        working_files = dict(self._walk_working_files())
         
-        for path in sorted(all_paths):
+        # Find paths whose content may differ
+        changed = []
+        for path in sorted(set(index_files) | set(working_files)):
             index_hash = index_files.get(path)
             working_path = working_files.get(path)
             
             # Quick hash comparison for files in index
             if index_hash and working_path:
-                from lit.core.hash import hash_file
                 try:
-                    working_hash = hash_file(working_path)
-                    if working_hash == index_hash:
+                    if self._hash_working_file(path, working_path) == index_hash:
                         # File unchanged, skip
                         continue
-                except:
+                except OSError:
                     pass
             
-            # Get content
-            old_content = None
-            if index_hash:
-                try:
-                    old_blob = self.repo.read_object(index_hash)
-                    old_content = old_blob.data
-                except:
-                    pass
+            changed.append((path, index_hash, working_path))
+        
+        # Read every needed index blob in one batch; unreadable ones are
+        # left out and treated as missing
+        blobs = self.repo.read_objects_bulk(
+            index_hash for _, index_hash, _ in changed if index_hash
+        )
+        
+        diffs = []
+        for path, index_hash, working_path in changed:
+            old_content = getattr(blobs.get(index_hash), 'data', None)
             
             new_content = None
             if working_path:
                 try:
-                    new_content = Path(working_path).read_bytes()
-                except:
+                    with open(working_path, 'rb') as f:
+                        new_content = f.read()
+                except OSError:
                     pass
             
             # Skip if unchanged (fallback check)
             if old_content == new_content:
                 continue
             
-            diff = self.diff_blobs(path, old_content, new_content)
-            diffs.append(diff)
+            diffs.append(self.diff_blobs(path, old_content, new_content))
+        
+        # Only files in both the index and the working tree are looked up
+        self._save_stat_cache(index_files.keys() & working_files.keys())
         
         return diffs
     
+    def _walk_working_files(self) -> Iterator[Tuple[str, str]]:
+        """
+        Walk the working tree, skipping dotfiles and dot-directories.
+        
+        Uses os.scandir with an explicit stack so hidden directories such
+        as .lit are pruned before they are entered, and entry types come
+        from the cached DirEntry data instead of extra stat calls.
+        
+        Yields:
+            Tuples of (path relative to repository root, absolute path)
+        """
+        stack = [(str(self.repo.work_tree), '')]
+        
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            
+            with entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    rel_path = os.path.join(prefix, entry.name) if prefix else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, rel_path))
+                    elif entry.is_file():
+                        yield rel_path, entry.path
+    
+    def _load_stat_cache(self) -> Dict[str, list]:
+        """Load the stat cache from disk on first use."""
+        if self._stat_cache is None:
+            self._stat_cache = {}
+            cache_file = self.repo.lit_dir / STAT_CACHE_FILE
+            if cache_file.exists():
+                try:
+                    self._stat_cache = json.loads(cache_file.read_text())
+                except (OSError, ValueError):
+                    pass
+        return self._stat_cache
+    
+    def _save_stat_cache(self, visited: Set[str]) -> None:
+        """
+        Persist the stat cache if it changed.
+        
+        Entries for paths the walk did not look up (deleted, renamed or
+        unstaged files) are dropped first, so the cache doesn't grow
+        without bound.
+        
+        Args:
+            visited: Paths whose hashes the walk looked up
+        """
+        cache = self._load_stat_cache()
+        stale = cache.keys() - visited
+        if stale:
+            for path in stale:
+                del cache[path]
+            self._stat_cache_dirty = True
+        
+        if not self._stat_cache_dirty:
+            return
+        
+        cache_file = self.repo.lit_dir / STAT_CACHE_FILE
+        try:
+            cache_file.write_text(json.dumps(cache))
+        except OSError:
+            pass
+        self._stat_cache_dirty = False
+    
+    def _hash_working_file(self, path: str, working_path: str) -> str:
+        """
+        Hash a working tree file, reusing the last hash if its stat is unchanged.
+        
+        The cache is keyed on (mtime_ns, size, inode), like the stat data in
+        the index. Files modified in the last couple of seconds are never
+        cached, since a same-size rewrite within the filesystem's timestamp
+        granularity would otherwise go unnoticed.
+        
+        Args:
+            path: Path relative to repository root
+            working_path: Absolute path to the file
+            
+        Returns:
+            str: SHA-1 hash of the file content
+        """
+        cache = self._load_stat_cache()
+        st = os.stat(working_path)
+        stat_key = [st.st_mtime_ns, st.st_size, st.st_ino]
+        
+        cached = cache.get(path)
+        if cached is not None and cached[:3] == stat_key:
+            return cached[3]
+        
+        working_hash = hash_file(working_path)
+        
+        if st.st_mtime_ns < time.time_ns() - RACY_WINDOW_NS:
+            cache[path] = stat_key + [working_hash]
+            self._stat_cache_dirty = True
+        
+        return working_hash
+    
     def diff_index_to_head(self) -> List[FileDiff]:
         """
         Compute diff between index (staged) and HEAD.
@@ -319,9 +568,6 @@ class DiffEngine:
         Returns:
             List of FileDiff objects
         """
-        from lit.core.index import Index
-        from lit.core.objects import Commit, Tree
-        
         # Get HEAD tree
         head_files = {}
         refs_mgr = self.repo.refs
@@ -344,54 +590,67 @@ class DiffEngine:
         
         return self.diff_trees(head_files, index_files)
     
-    def format_diff(self, diffs: List[FileDiff], color: bool = True) -> str:
+    def format_diff(self, diffs: List[FileDiff], color: bool = True, *,
+                    out: Optional[TextIO] = None) -> Optional[str]:
         """
         Format diffs as unified diff output.
         
         Args:
             diffs: List of FileDiff objects
             color: Whether to use color output
+            out: Text stream to write to; when given, the output is
+                streamed hunk by hunk instead of built up in memory
         
         Returns:
-            Formatted diff string
+            Formatted diff string, or None when written to out
         """
-        from colorama import Fore, Style
+        blocks = self._iter_diff_blocks(diffs, color)
         
-        output = []
+        if out is None:
+            return '\n'.join(blocks)
+        
+        for block in blocks:
+            out.write(block)
+            out.write('\n')
+        return None
+    
+    def _iter_diff_blocks(self, diffs: List[FileDiff], color: bool) -> Iterator[str]:
+        """Yield formatted output one file header or hunk at a time."""
+        if color:
+            cyan, reset = _C_CYAN, _C_RESET
+        else:
+            cyan = reset = ''
+        color_by_sign = {'+': _C_GREEN, '-': _C_RED}
         
         for diff in diffs:
             # File header
+            header = [f"diff --lit a/{diff.path} b/{diff.path}"]
+            old_name = f"a/{diff.path}"
+            new_name = f"b/{diff.path}"
             if diff.is_new:
-                output.append(f"diff --lit a/{diff.path} b/{diff.path}")
-                output.append("new file mode 100644")
-                output.append(f"--- /dev/null")
-                output.append(f"+++ b/{diff.path}")
+                header.append("new file mode 100644")
+                old_name = "/dev/null"
             elif diff.is_deleted:
-                output.append(f"diff --lit a/{diff.path} b/{diff.path}")
-                output.append("deleted file mode 100644")
-                output.append(f"--- a/{diff.path}")
-                output.append(f"+++ /dev/null")
-            else:
-                output.append(f"diff --lit a/{diff.path} b/{diff.path}")
-                output.append(f"--- a/{diff.path}")
-                output.append(f"+++ b/{diff.path}")
+                header.append("deleted file mode 100644")
+                new_name = "/dev/null"
+            
+            if diff.is_binary:
+                header.append(f"Binary files {old_name} and {new_name} differ")
+                yield '\n'.join(header)
+                continue
+            
+            header.append(f"--- {old_name}")
+            header.append(f"+++ {new_name}")
+            yield '\n'.join(header)
             
             # Hunks
             for hunk in diff.hunks:
+                lines = [f"{cyan}{hunk}{reset}"]
                 if color:
-                    output.append(f"{Fore.CYAN}{hunk}{Style.RESET_ALL}")
-                else:
-                    output.append(str(hunk))
-                
-                for line in hunk.lines:
-                    if color:
-                        if line.startswith('+'):
-                            output.append(f"{Fore.GREEN}{line}{Style.RESET_ALL}")
-                        elif line.startswith('-'):
-                            output.append(f"{Fore.RED}{line}{Style.RESET_ALL}")
-                        else:
-                            output.append(line)
-                    else:
-                        output.append(line)
-        
-        return '\n'.join(output)
+                    for line in hunk.lines:
+                        code = color_by_sign.get(line[:1])
+                        lines.append(f"{code}{line}{reset}" if code else line)
+                elif hunk._count:
+                    # Uncolored lines go out as one block straight from the buffer
+                    lines.append(hunk.text)
+                yield '\n'.join(lines)
@@ -1,9 +1,48 @@
 """Merge operations for Lit VCS."""
 
+import heapq
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Optional, List, Set, Tuple, Dict
+from typing import Optional, List, Set, Tuple, Dict, Iterator
 from dataclasses import dataclass
 
+from lit.core.commit_graph import CommitGraph
+from lit.operations.myers import bounded_myers_diff
+
+# Numpy is optional: when installed, long equal-length merges compare
+# their lines as integer columns instead of one line at a time
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Flags painted on commits while searching for merge bases
+_PARENT1 = 1
+_PARENT2 = 2
+_BOTH_PARENTS = _PARENT1 | _PARENT2
+_STALE = 4
+_RESULT = 8
+
+# Merge bases found by earlier runs, keyed by "<hash> <hash>" (sorted).
+# Commits are immutable, so an entry stays valid for as long as both exist
+MERGE_BASE_CACHE_FILE = 'merge-base-cache.json'
+
+# Constant parts of conflict markers
+_CM_HEAD = b"<<<<<<< HEAD\n"
+_CM_SEP = b"=======\n"
+
+# Number of files changed on both sides in one directory above which they
+# are merged on a thread pool
+PARALLEL_MERGE_THRESHOLD = 8
+
+# Line count from which equal-length merges use numpy columns
+VECTORIZE_MIN_LINES = 512
+
 
 @dataclass
 class MergeConflict:
@@ -36,6 +75,136 @@ class MergeResult:
         return f"MergeResult(failed, conflicts={len(self.conflicts)})"
 
 
+def _merge_line_columns(base_lines: List, ours_lines: List, theirs_lines: List) -> Optional[List]:
+    """
+    Merge equal-length line lists with vectorized comparisons.
+    
+    Lines are interned to exact integer ids (no hashing, so distinct lines
+    can never compare equal) and compared as three numpy columns.
+    
+    Returns:
+        Merged lines, or None if some line changed on both sides
+    """
+    n = len(base_lines)
+    vocab = {}
+    base, ours, theirs = (
+        np.fromiter((vocab.setdefault(line, len(vocab)) for line in lines), dtype=np.int64, count=n)
+        for lines in (base_lines, ours_lines, theirs_lines)
+    )
+    
+    if ((ours != theirs) & (ours != base) & (theirs != base)).any():
+        return None
+    
+    take_theirs = ((ours == base) & (theirs != base)).tolist()
+    return [t if pick else o for o, t, pick in zip(ours_lines, theirs_lines, take_theirs)]
+
+
+def _merge3_lines(base: List, ours: List, theirs: List) -> Optional[List]:
+    """
+    Three-way merge of line lists (diff3).
+    
+    Diffs base against each side and walks both change lists in order of
+    base position. Changes that touch disjoint base ranges are all applied;
+    overlapping changes (or insertions at the same point) merge only if
+    both sides produced the same lines there.
+    
+    Returns:
+        Merged lines, or None if the sides conflict or either side changed
+        too much to diff within the Myers edit cost cap
+    """
+    sides = (ours, theirs)
+    
+    # (base_start, base_end, side_start, side_end, side_index) for every edit
+    changes = []
+    for index, side in enumerate(sides):
+        opcodes = bounded_myers_diff(base, side)
+        if opcodes is None:
+            # Heavily rewritten: the whole file is reported as a conflict
+            return None
+        changes.extend(
+            (i1, i2, j1, j2, index)
+            for tag, i1, i2, j1, j2 in opcodes if tag != 'equal'
+        )
+    changes.sort(key=lambda change: (change[0], change[1]))
+    
+    # Group changes whose base ranges overlap or start at the same line
+    groups = []
+    for change in changes:
+        if groups:
+            group, start, end = groups[-1]
+            if change[0] < end or change[0] == group[-1][0]:
+                group.append(change)
+                groups[-1] = (group, start, max(end, change[1]))
+                continue
+        groups.append(([change], change[0], change[1]))
+    
+    merged = []
+    position = 0
+    for group, start, end in groups:
+        merged.extend(base[position:start])
+        position = end
+        
+        # Text of each side over base[start:end]
+        texts = []
+        for index, side in enumerate(sides):
+            edits = [change for change in group if change[4] == index]
+            if edits:
+                first, last = edits[0], edits[-1]
+                texts.append(side[first[2] - (first[0] - start):last[3] + (end - last[1])])
+        
+        if len(texts) == 2 and texts[0] != texts[1]:
+            return None
+        merged.extend(texts[0])
+    
+    merged.extend(base[position:])
+    return merged
+
+
+def _line_end(content: bytes) -> bytes:
+    """Newline needed to terminate content before a conflict marker."""
+    return b'' if not content or content.endswith(b'\n') else b'\n'
+
+
+def _iter_aligned_entries(*trees) -> Iterator[Tuple]:
+    """
+    Merge-join the entries of several trees by name.
+    
+    Tree entries are kept sorted by name, so the trees are walked side by
+    side without building lookup dicts.
+    
+    Args:
+        *trees: Tree objects, or None for a missing tree
+        
+    Yields:
+        (name, entry_per_tree...) in name order, with None where a tree
+        has no entry of that name
+    """
+    streams = [
+        zip([entry.name for entry in tree.entries], repeat(side), tree.entries)
+        for side, tree in enumerate(trees) if tree is not None
+    ]
+    
+    current = None
+    row = [None] * len(trees)
+    for name, side, entry in heapq.merge(*streams):
+        if name != current:
+            if current is not None:
+                yield (current, *row)
+                row = [None] * len(trees)
+            current = name
+        row[side] = entry
+    
+    if current is not None:
+        yield (current, *row)
+
+
+def _same_entry(a, b) -> bool:
+    """Check whether two tree entries (or absences) are the same object."""
+    if a is None or b is None:
+        return a is b
+    return a.hash == b.hash and a.type == b.type
+
+
 class MergeEngine:
     """
     Handles merge operations for Lit VCS.
@@ -56,8 +225,25 @@ class MergeEngine:
             repo: Repository instance
         """
         self.repo = repo
+        self._commit_graph = None
         self._auto_resolve = False  # OT auto-merge flag
-        self._auto_resolve = False  # OT auto-merge flag
+        
+        # Per-merge memo of history walks, cleared when merge() returns
+        self._ancestor_cache: Dict[str, Set[str]] = {}
+        self._merge_base_cache: Dict[frozenset, Optional[str]] = {}
+        
+        # Merge bases persisted across runs, loaded on first use
+        self._stored_merge_bases: Optional[Dict[str, str]] = None
+        
+        # Blob contents read during one three_way_merge call
+        self._blob_cache: Dict[str, Optional[bytes]] = {}
+    
+    @property
+    def commit_graph(self) -> CommitGraph:
+        """Commit-graph cache used for history walks."""
+        if self._commit_graph is None:
+            self._commit_graph = CommitGraph(self.repo)
+        return self._commit_graph
     
     @property
     def auto_resolve(self) -> bool:
@@ -73,8 +259,11 @@ class MergeEngine:
         """
         Find the common ancestor (merge base) of two commits.
         
-        Uses a breadth-first search to find the first common ancestor
-        in the commit history graph.
+        Walks both histories at once, highest generation number first, in
+        the style of Git's paint_down_to_common: every commit is painted with the side(s)
+        it is reachable from, and the first commits reachable from both
+        sides are the merge base candidates. Their ancestors are marked
+        stale so the walk stops as soon as nothing new can be found.
         
         Args:
             commit1_hash: First commit hash
@@ -83,114 +272,168 @@ class MergeEngine:
         Returns:
             Hash of merge base commit, or None if no common ancestor
         """
-        from lit.core.objects import Commit
-        
         # Handle same commit
         if commit1_hash == commit2_hash:
             return commit1_hash
         
-        # Build ancestor sets for both commits
-        ancestors1 = self._get_ancestors(commit1_hash)
-        ancestors2 = self._get_ancestors(commit2_hash)
+        key = frozenset((commit1_hash, commit2_hash))
+        if key in self._merge_base_cache:
+            return self._merge_base_cache[key]
         
-        # Find common ancestors
-        common_ancestors = ancestors1 & ancestors2
+        stored_key = ' '.join(sorted(key))
+        merge_base = self._load_merge_base_cache().get(stored_key)
+        if merge_base is not None:
+            self._merge_base_cache[key] = merge_base
+            return merge_base
         
-        if not common_ancestors:
-            return None
+        bases = self._paint_down_to_common(commit1_hash, commit2_hash)
+        self.commit_graph.save()
         
-        # Find the best common ancestor (closest to both commits)
-        # This is the one that has the shortest distance sum to both commits
-        best_ancestor = None
-        min_distance = float('inf')
+        if len(bases) > 1:
+            bases = self._remove_redundant(bases)
         
-        for ancestor in common_ancestors:
-            dist1 = self._distance_to_commit(commit1_hash, ancestor)
-            dist2 = self._distance_to_commit(commit2_hash, ancestor)
-            total_dist = dist1 + dist2
-            
-            if total_dist < min_distance:
-                min_distance = total_dist
-                best_ancestor = ancestor
+        # Candidates come out highest generation first
+        merge_base = bases[0] if bases else None
+        self._merge_base_cache[key] = merge_base
         
-        return best_ancestor
+        # No result is not stored: a missing commit may be fetched later
+        if merge_base is not None:
+            self._stored_merge_bases[stored_key] = merge_base
+            self._save_merge_base_cache()
+        
+        return merge_base
     
-    def _get_ancestors(self, commit_hash: str) -> Set[str]:
+    def _load_merge_base_cache(self) -> Dict[str, str]:
+        """Load merge bases saved by earlier runs on first use."""
+        if self._stored_merge_bases is None:
+            self._stored_merge_bases = {}
+            cache_file = self.repo.lit_dir / MERGE_BASE_CACHE_FILE
+            if cache_file.exists():
+                try:
+                    data = json.loads(cache_file.read_text())
+                except (OSError, ValueError):
+                    data = None
+                if isinstance(data, dict):
+                    self._stored_merge_bases = data
+        return self._stored_merge_bases
+    
+    def _save_merge_base_cache(self) -> None:
+        """Write the merge bases to disk, replacing the file atomically."""
+        cache_file = self.repo.lit_dir / MERGE_BASE_CACHE_FILE
+        tmp_file = cache_file.with_name(MERGE_BASE_CACHE_FILE + '.tmp')
+        try:
+            tmp_file.write_text(json.dumps(self._stored_merge_bases))
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+    
+    def _paint_down_to_common(self, commit1_hash: str, commit2_hash: str) -> List[str]:
         """
-        Get all ancestors of a commit.
+        Collect the best common ancestors of two commits in one walk.
         
         Args:
-            commit_hash: Starting commit hash
+            commit1_hash: First commit hash
+            commit2_hash: Second commit hash
             
         Returns:
-            Set of ancestor commit hashes (including the commit itself)
+            Merge base candidates, highest generation first
         """
-        from lit.core.objects import Commit
-        
-        ancestors = set()
-        to_visit = [commit_hash]
-        visited = set()
-        
-        while to_visit:
-            current = to_visit.pop(0)
-            
-            if current in visited:
-                continue
+        graph = self.commit_graph
+        
+        def priority(commit_hash):
+            # Generation first: a commit is never popped before one of its
+            # descendants, whatever the commit clocks say
+            return (-graph.generation(commit_hash), -graph.commit_time(commit_hash))
+        
+        flags = {commit1_hash: _PARENT1, commit2_hash: _PARENT2}
+        queue = []
+        counter = 0
+        for commit_hash in (commit1_hash, commit2_hash):
+            heapq.heappush(queue, (priority(commit_hash), counter, commit_hash))
+            counter += 1
+        
+        results = []
+        
+        # Stop once every queued commit is below a known merge base
+        while any(not flags[entry[2]] & _STALE for entry in queue):
+            _, _, current = heapq.heappop(queue)
+            paint = flags[current] & (_PARENT1 | _PARENT2 | _STALE)
             
-            visited.add(current)
-            ancestors.add(current)
+            if paint & _BOTH_PARENTS == _BOTH_PARENTS:
+                if not flags[current] & _RESULT:
+                    flags[current] |= _RESULT
+                    results.append(current)
+                # Ancestors of a merge base are never better ones
+                paint |= _STALE
             
-            try:
-                commit = self.repo.read_object(current)
-                if isinstance(commit, Commit):
-                    for parent in commit.parents:
-                        if parent not in visited:
-                            to_visit.append(parent)
-            except:
-                pass
-        
-        return ancestors
+            for parent in graph.parents(current):
+                if flags.get(parent, 0) & paint == paint:
+                    continue
+                flags[parent] = flags.get(parent, 0) | paint
+                heapq.heappush(queue, (priority(parent), counter, parent))
+                counter += 1
+        
+        # Candidates later found to sit below another candidate are dropped
+        return [commit_hash for commit_hash in results if not flags[commit_hash] & _STALE]
+    
+    def _remove_redundant(self, bases: List[str]) -> List[str]:
+        """Drop candidates that are ancestors of another candidate."""
+        redundant = set()
+        for base in bases:
+            if base in redundant:
+                continue
+            ancestors = self._get_ancestors(base)
+            ancestors.discard(base)
+            redundant.update(other for other in bases if other in ancestors)
+        return [base for base in bases if base not in redundant]
     
-    def _distance_to_commit(self, start_hash: str, target_hash: str) -> int:
+    def _get_ancestors(self, commit_hash: str) -> Set[str]:
         """
-        Calculate distance (number of commits) from start to target.
+        Get all ancestors of a commit.
         
         Args:
-            start_hash: Starting commit hash
-            target_hash: Target commit hash
+            commit_hash: Starting commit hash
             
         Returns:
-            Number of commits in path, or infinity if no path exists
+            Set of ancestor commit hashes (including the commit itself)
         """
-        from lit.core.objects import Commit
+        ancestors = self._ancestor_cache.get(commit_hash)
+        if ancestors is None:
+            ancestors = set(self._iter_ancestors(commit_hash))
+            self._ancestor_cache[commit_hash] = ancestors
+        return set(ancestors)
+    
+    def _iter_ancestors(self, commit_hash: str) -> Iterator[str]:
+        """
+        Yield a commit and its ancestors breadth-first, each once.
+        
+        Callers that only look for one commit can stop early instead of
+        walking the whole history.
         
-        if start_hash == target_hash:
-            return 0
+        Args:
+            commit_hash: Starting commit hash
+        """
+        from lit.core.objects import Commit
         
-        to_visit = [(start_hash, 0)]
-        visited = set()
+        visited = {commit_hash}
+        to_visit = deque([commit_hash])
+        read_object = self.repo.read_object
         
         while to_visit:
-            current, distance = to_visit.pop(0)
-            
-            if current == target_hash:
-                return distance
+            current = to_visit.popleft()
+            yield current
             
-            if current in visited:
+            try:
+                commit = read_object(current)
+            except Exception:
+                continue
+            if not isinstance(commit, Commit):
                 continue
             
-            visited.add(current)
-            
-            try:
-                commit = self.repo.read_object(current)
-                if isinstance(commit, Commit):
-                    for parent in commit.parents:
-                        if parent not in visited:
-                            to_visit.append((parent, distance + 1))
-            except:
-                pass
-        
-        return float('inf')
+            for parent in commit.parents:
+                if parent not in visited:
+                    visited.add(parent)
+                    to_visit.append(parent)
     
     def can_fast_forward(self, current_hash: str, target_hash: str) -> bool:
         """
@@ -206,11 +449,40 @@ class MergeEngine:
         Returns:
             True if fast-forward is possible
         """
-        # Get all ancestors of target
-        target_ancestors = self._get_ancestors(target_hash)
+        if current_hash == target_hash:
+            return True
         
-        # Current must be in target's ancestors for fast-forward
-        return current_hash in target_ancestors
+        # current is an ancestor of target exactly when it is their merge base
+        key = frozenset((current_hash, target_hash))
+        if key in self._merge_base_cache:
+            return self._merge_base_cache[key] == current_hash
+        
+        graph = self.commit_graph
+        current_generation = graph.generation(current_hash)
+        
+        # Walk down from target; stop as soon as current is seen
+        visited = {target_hash}
+        to_visit = deque([target_hash])
+        found = False
+        
+        while to_visit:
+            commit_hash = to_visit.popleft()
+            if commit_hash == current_hash:
+                found = True
+                break
+            
+            # Descendants of current have a higher generation, so nothing
+            # at or below current's generation can lead back to it
+            if graph.generation(commit_hash) <= current_generation:
+                continue
+            
+            for parent in graph.parents(commit_hash):
+                if parent not in visited:
+                    visited.add(parent)
+                    to_visit.append(parent)
+        
+        graph.save()
+        return found
     
     def fast_forward(self, target_hash: str) -> MergeResult:
         """
@@ -284,6 +556,24 @@ class MergeEngine:
                 message="Invalid commit objects"
             )
         
+        # Only one side changed the snapshot (or both made the same change):
+        # its tree is the result, with nothing to read or merge
+        if ours_commit.tree == theirs_commit.tree or base_commit.tree == theirs_commit.tree:
+            merged_tree_hash = ours_commit.tree
+        elif base_commit.tree == ours_commit.tree:
+            merged_tree_hash = theirs_commit.tree
+        else:
+            merged_tree_hash = None
+        
+        if merged_tree_hash is not None:
+            return MergeResult(
+                success=True,
+                conflicts=[],
+                merged_tree_hash=merged_tree_hash,
+                is_fast_forward=False,
+                message=f"Merged {theirs_hash[:7]} into {ours_hash[:7]}"
+            )
+        
         base_tree = self.repo.read_object(base_commit.tree)
         ours_tree = self.repo.read_object(ours_commit.tree)
         theirs_tree = self.repo.read_object(theirs_commit.tree)
@@ -295,11 +585,6 @@ class MergeEngine:
                 message="Invalid tree objects"
             )
         
-        # Get file dictionaries from trees
-        base_files = self._get_tree_files(base_tree)
-        ours_files = self._get_tree_files(ours_tree)
-        theirs_files = self._get_tree_files(theirs_tree)
-        
         # For 'recent' strategy, we need to know which commit is more recent
         ours_is_recent = True  # Default: ours is more recent (we're merging theirs into ours)
         if auto_strategy == 'recent':
@@ -311,28 +596,28 @@ class MergeEngine:
             except:
                 pass  # Default to ours if we can't determine
         
-        # Perform three-way merge
-        merged_files, conflicts = self._merge_files(
-            base_files, ours_files, theirs_files, 
-            auto_strategy=auto_strategy,
-            ours_is_recent=ours_is_recent,
-            theirs_branch=theirs_branch
-        )
+        # Perform three-way merge, descending only into directories that
+        # changed on both sides
+        conflicts = []
+        try:
+            merged_tree_hash = self._merge_trees(
+                base_tree, ours_tree, theirs_tree, '', conflicts,
+                auto_strategy=auto_strategy,
+                ours_is_recent=ours_is_recent,
+                theirs_branch=theirs_branch
+            )
+        finally:
+            self._blob_cache.clear()
         
         if conflicts:
+            # Files of a directory are merged after its subdirectories
+            conflicts.sort(key=lambda conflict: conflict.path)
             return MergeResult(
                 success=False,
                 conflicts=conflicts,
                 message=f"Merge conflicts in {len(conflicts)} file(s)"
             )
         
-        # Create merged tree
-        merged_tree = Tree()
-        for path, file_hash in merged_files.items():
-            merged_tree.add_entry('100644', 'blob', file_hash, path)
-        
-        merged_tree_hash = self.repo.write_object(merged_tree)
-        
         return MergeResult(
             success=True,
             conflicts=[],
@@ -341,128 +626,209 @@ class MergeEngine:
             message=f"Merged {theirs_hash[:7]} into {ours_hash[:7]}"
         )
     
-    def _get_tree_files(self, tree) -> Dict[str, str]:
+    def _merge_trees(
+        self,
+        base_tree,
+        ours_tree,
+        theirs_tree,
+        prefix: str,
+        conflicts: List[MergeConflict],
+        **options
+    ) -> Optional[str]:
         """
-        Get all files in a tree as a flat dictionary.
+        Merge three versions of a directory and write the result.
+        
+        Entries that match on two sides are resolved by hash alone: a
+        subtree changed on only one side is taken wholesale without being
+        read. Only directories changed on both sides are descended into.
         
         Args:
-            tree: Tree object
+            base_tree: Tree in base (common ancestor), or None
+            ours_tree: Tree in our branch, or None
+            theirs_tree: Tree in their branch, or None
+            prefix: Path of this directory, ending in '/' (empty at root)
+            conflicts: List that conflicting files are appended to
+            **options: auto_strategy, ours_is_recent and theirs_branch,
+                passed on to _merge_blob
+            
+        Returns:
+            Hash of the merged tree, or None if a subdirectory ends up empty
+        """
+        from lit.core.objects import Tree, TreeEntry
+        
+        entries = []
+        blob_merges = []
+        
+        for name, base, ours, theirs in _iter_aligned_entries(base_tree, ours_tree, theirs_tree):
+            if _same_entry(ours, theirs) or _same_entry(base, theirs):
+                # Same change on both sides, or only we changed it
+                merged = ours
+            elif _same_entry(base, ours):
+                # Only they changed it
+                merged = theirs
+            elif all(entry is None or entry.type == 'blob' for entry in (base, ours, theirs)):
+                # Files are merged together below
+                blob_merges.append((name, base, ours, theirs))
+                continue
+            else:
+                merged = self._merge_entry(prefix + name, base, ours, theirs, conflicts, **options)
             
+            if merged is not None:
+                entries.append(merged)
+        
+        merged_blobs = self._merge_blobs(prefix, blob_merges, **options)
+        for (name, base, ours, theirs), (merged_hash, conflict) in zip(blob_merges, merged_blobs):
+            if conflict is not None:
+                conflicts.append(conflict)
+            else:
+                entries.append(TreeEntry((ours or theirs).mode, 'blob', merged_hash, name))
+        
+        if not entries and prefix:
+            return None
+        
+        # Sorted once here rather than on every add_entry
+        merged_tree = Tree()
+        merged_tree.entries = sorted(entries)
+        return self.repo.write_object(merged_tree)
+    
+    def _merge_entry(self, path: str, base, ours, theirs,
+                     conflicts: List[MergeConflict], **options):
+        """
+        Merge a directory changed differently on both sides, or a name
+        that is a file on one side and a directory on the other.
+        
         Returns:
-            Dict mapping file paths to blob hashes
+            The merged TreeEntry, or None if it is deleted or conflicted
+        """
+        from lit.core.objects import Tree, TreeEntry
+        
+        kinds = {entry.type for entry in (base, ours, theirs) if entry is not None}
+        name = path.rsplit('/', 1)[-1]
+        
+        if kinds == {'tree'}:
+            trees = []
+            for entry in (base, ours, theirs):
+                tree = self.repo.read_object(entry.hash) if entry is not None else None
+                trees.append(tree if isinstance(tree, Tree) else None)
+            
+            tree_hash = self._merge_trees(*trees, path + '/', conflicts, **options)
+            return TreeEntry('040000', 'tree', tree_hash, name) if tree_hash else None
+        
+        # A file on one side and a directory on the other
+        def blob_content(entry):
+            if entry is None or entry.type != 'blob':
+                return None
+            return self._get_blob_content(entry.hash)
+        
+        conflicts.append(MergeConflict(
+            path=path,
+            base_content=blob_content(base),
+            ours_content=blob_content(ours),
+            theirs_content=blob_content(theirs)
+        ))
+        return None
+    
+    def _merge_blobs(self, prefix: str, jobs: List[Tuple], **options
+                     ) -> List[Tuple[Optional[str], Optional[MergeConflict]]]:
         """
-        from lit.core.objects import Tree
+        Merge the files of one directory that changed on both sides.
         
-        files = {}
+        Each file is independent and mostly spends its time in object
+        reads, zlib and writes, which release the GIL, so many files are
+        merged on a thread pool.
         
-        for entry in tree.entries:
-            if entry.type == 'blob':
-                files[entry.name] = entry.hash
-            elif entry.type == 'tree':
-                # Recursively get files from subtree
-                subtree = self.repo.read_object(entry.hash)
-                if isinstance(subtree, Tree):
-                    subfiles = self._get_tree_files(subtree)
-                    for path, file_hash in subfiles.items():
-                        files[f"{entry.name}/{path}"] = file_hash
+        Args:
+            prefix: Path of the directory, ending in '/' (empty at root)
+            jobs: (name, base, ours, theirs) tree entries, None where absent
+            **options: Passed on to _merge_blob
+            
+        Returns:
+            _merge_blob results in the order of jobs
+        """
+        def merge_one(job):
+            name, base, ours, theirs = job
+            return self._merge_blob(
+                prefix + name,
+                base.hash if base else None,
+                ours.hash if ours else None,
+                theirs.hash if theirs else None,
+                **options
+            )
         
-        return files
+        if len(jobs) > PARALLEL_MERGE_THRESHOLD:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                return list(pool.map(merge_one, jobs))
+        return [merge_one(job) for job in jobs]
     
-    def _merge_files(
+    def _merge_blob(
         self,
-        base_files: Dict[str, str],
-        ours_files: Dict[str, str],
-        theirs_files: Dict[str, str],
+        path: str,
+        base_hash: Optional[str],
+        ours_hash: Optional[str],
+        theirs_hash: Optional[str],
         auto_strategy: Optional[str] = None,
         ours_is_recent: bool = True,
         theirs_branch: Optional[str] = None
-    ) -> Tuple[Dict[str, str], List[MergeConflict]]:
+    ) -> Tuple[Optional[str], Optional[MergeConflict]]:
         """
-        Merge file dictionaries using three-way merge logic.
+        Merge a file changed on both sides.
         
         Args:
-            base_files: Files in base (common ancestor)
-            ours_files: Files in our branch
-            theirs_files: Files in their branch
+            path: File path
+            base_hash: Blob hash in base (None if absent)
+            ours_hash: Blob hash in our branch (None if deleted)
+            theirs_hash: Blob hash in their branch (None if deleted)
             auto_strategy: Strategy for auto-resolving conflicts
             ours_is_recent: Whether ours is the more recent commit
             theirs_branch: Name of the branch being merged in (for messages)
             
         Returns:
-            Tuple of (merged_files, conflicts)
+            Tuple of (merged blob hash, None) or (None, conflict)
         """
-        merged_files = {}
-        conflicts = []
+        from lit.core.objects import Blob
         
-        # Get all file paths across all three versions
-        all_paths = set(base_files.keys()) | set(ours_files.keys()) | set(theirs_files.keys())
+        hashes = (base_hash, ours_hash, theirs_hash)
         
-        for path in sorted(all_paths):
-            base_hash = base_files.get(path)
-            ours_hash = ours_files.get(path)
-            theirs_hash = theirs_files.get(path)
-            
-            # Case 1: File unchanged in both branches (or same change)
-            if ours_hash == theirs_hash:
-                if ours_hash:
-                    merged_files[path] = ours_hash
-                # If both deleted, don't include in merged
-                continue
-            
-            # Case 2: File only changed in our branch
-            if base_hash == theirs_hash and ours_hash != base_hash:
-                if ours_hash:
-                    merged_files[path] = ours_hash
-                # If we deleted it, don't include
-                continue
-            
-            # Case 3: File only changed in their branch
-            if base_hash == ours_hash and theirs_hash != base_hash:
-                if theirs_hash:
-                    merged_files[path] = theirs_hash
-                # If they deleted it, don't include
-                continue
-            
-            # Case 4: File changed in both branches - potential conflict
-            # Try to auto-merge if possible
-            base_content = self._get_blob_content(base_hash) if base_hash else None
-            ours_content = self._get_blob_content(ours_hash) if ours_hash else None
-            theirs_content = self._get_blob_content(theirs_hash) if theirs_hash else None
-            
-            # Try line-based merge first
-            merged_content = self._try_auto_merge(base_content, ours_content, theirs_content)
-            
-            # If line-based failed and we have an auto_strategy, try strategy-based resolution
-            if merged_content is None and auto_strategy:
-                merged_content = self._resolve_with_strategy(
-                    base_content, ours_content, theirs_content,
-                    auto_strategy, ours_is_recent, theirs_branch
-                )
-            
-            if merged_content is not None:
-                # Auto-merge succeeded
-                from lit.core.objects import Blob
-                blob = Blob(merged_content)
-                merged_hash = self.repo.write_object(blob)
-                merged_files[path] = merged_hash
-            else:
-                # Conflict detected
-                conflicts.append(MergeConflict(
-                    path=path,
-                    base_content=base_content,
-                    ours_content=ours_content,
-                    theirs_content=theirs_content
-                ))
+        # A file added or deleted on one side has no line merge, so its
+        # contents are only read if a strategy or conflict needs them
+        merged_content = None
+        if all(hashes):
+            merged_content = self._try_auto_merge(*self._load_contents(hashes))
+        
+        # If line-based failed and we have an auto_strategy, try strategy-based resolution
+        if merged_content is None and auto_strategy:
+            merged_content = self._resolve_with_strategy(
+                *self._load_contents(hashes),
+                auto_strategy, ours_is_recent, theirs_branch
+            )
         
-        return merged_files, conflicts
+        if merged_content is None:
+            base_content, ours_content, theirs_content = self._load_contents(hashes)
+            return None, MergeConflict(
+                path=path,
+                base_content=base_content,
+                ours_content=ours_content,
+                theirs_content=theirs_content
+            )
+        
+        return self.repo.write_object(Blob(merged_content)), None
+    
+    def _load_contents(self, hashes: Tuple[Optional[str], ...]) -> Tuple[Optional[bytes], ...]:
+        """Read blob contents for hashes, with None for a missing side."""
+        return tuple(self._get_blob_content(h) if h else None for h in hashes)
     
     def _get_blob_content(self, blob_hash: str) -> Optional[bytes]:
-        """Get content of a blob."""
+        """Get content of a blob, cached for the duration of a merge."""
+        if blob_hash in self._blob_cache:
+            return self._blob_cache[blob_hash]
+        
         try:
-            blob = self.repo.read_object(blob_hash)
-            return blob.data
-        except:
-            return None
+            content = self.repo.read_object(blob_hash).data
+        except Exception:
+            content = None
+        
+        self._blob_cache[blob_hash] = content
+        return content
     
     def _try_auto_merge(
         self,
@@ -485,39 +851,30 @@ class MergeEngine:
         if base_content is None or ours_content is None or theirs_content is None:
             return None
         
+        # Only one side changed: take it whole without comparing lines
+        if ours_content == theirs_content or theirs_content == base_content:
+            return ours_content
+        if ours_content == base_content:
+            return theirs_content
+        
         try:
-            # Split into lines
-            base_lines = base_content.decode('utf-8', errors='replace').splitlines(keepends=True)
-            ours_lines = ours_content.decode('utf-8', errors='replace').splitlines(keepends=True)
-            theirs_lines = theirs_content.decode('utf-8', errors='replace').splitlines(keepends=True)
+            # Split into lines, staying in bytes so nothing is decoded
+            base_lines = base_content.splitlines(keepends=True)
+            ours_lines = ours_content.splitlines(keepends=True)
+            theirs_lines = theirs_content.splitlines(keepends=True)
             
-            # Simple line-based merge
-            # If changes are in different parts of file, we can merge
-            # For now, just detect if they modified same lines
+            # Long files edited in place: compare line by line as columns
+            if (np is not None and len(base_lines) >= VECTORIZE_MIN_LINES
+                    and len(base_lines) == len(ours_lines) == len(theirs_lines)):
+                merged_lines = _merge_line_columns(base_lines, ours_lines, theirs_lines)
+                if merged_lines is not None:
+                    return b''.join(merged_lines)
             
-            if len(base_lines) != len(ours_lines) or len(base_lines) != len(theirs_lines):
-                # Different number of lines - more complex merge needed
+            merged_lines = _merge3_lines(base_lines, ours_lines, theirs_lines)
+            if merged_lines is None:
                 return None
             
-            merged_lines = []
-            for i, base_line in enumerate(base_lines):
-                ours_line = ours_lines[i]
-                theirs_line = theirs_lines[i]
-                
-                if ours_line == theirs_line:
-                    # Same in both
-                    merged_lines.append(ours_line)
-                elif ours_line == base_line:
-                    # Only changed in theirs
-                    merged_lines.append(theirs_line)
-                elif theirs_line == base_line:
-                    # Only changed in ours
-                    merged_lines.append(ours_line)
-                else:
-                    # Both changed same line - conflict
-                    return None
-            
-            return ''.join(merged_lines).encode('utf-8')
+            return b''.join(merged_lines)
         
         except:
             # Any error in merge logic - report conflict
@@ -601,30 +958,16 @@ class MergeEngine:
         Returns:
             File content with conflict markers
         """
-        result = []
-        
-        # Header
-        result.append(f"<<<<<<< HEAD\n".encode('utf-8'))
-        
-        # Our version
-        if ours_content:
-            result.append(ours_content)
-            if not ours_content.endswith(b'\n'):
-                result.append(b'\n')
-        
-        # Separator
-        result.append(f"=======\n".encode('utf-8'))
-        
-        # Their version
-        if theirs_content:
-            result.append(theirs_content)
-            if not theirs_content.endswith(b'\n'):
-                result.append(b'\n')
-        
-        # Footer
-        result.append(f">>>>>>> {path}\n".encode('utf-8'))
-        
-        return b''.join(result)
+        ours = ours_content or b''
+        theirs = theirs_content or b''
+        
+        return b''.join((
+            _CM_HEAD,
+            ours, _line_end(ours),
+            _CM_SEP,
+            theirs, _line_end(theirs),
+            f">>>>>>> {path}\n".encode('utf-8'),
+        ))
     
     def write_conflicts_to_working_tree(self, conflicts: List[MergeConflict]) -> None:
         """
@@ -659,37 +1002,27 @@ class MergeEngine:
             theirs_hash: Hash of commit being merged
             conflicts: List of conflicts
         """
-        # Write MERGE_HEAD
-        merge_head_file = self.repo.lit_dir / 'MERGE_HEAD'
-        merge_head_file.write_text(theirs_hash + '\n')
+        lit_dir = self.repo.lit_dir
+        
+        # Write MERGE_MSG with conflict info
+        msg_lines = ["Merge conflicts detected\n", "\n", "Conflicts:\n"]
+        msg_lines.extend(f"\t{conflict.path}\n" for conflict in conflicts)
+        (lit_dir / 'MERGE_MSG').write_text(''.join(msg_lines))
         
         # Write MERGE_MODE
-        merge_mode_file = self.repo.lit_dir / 'MERGE_MODE'
-        merge_mode_file.write_text('merge\n')
+        (lit_dir / 'MERGE_MODE').write_text('merge\n')
         
-        # Write MERGE_MSG with conflict info
-        merge_msg_file = self.repo.lit_dir / 'MERGE_MSG'
-        msg_lines = [
-            f"Merge conflicts detected\n",
-            f"\n",
-            f"Conflicts:\n"
-        ]
-        for conflict in conflicts:
-            msg_lines.append(f"\t{conflict.path}\n")
-        merge_msg_file.write_text(''.join(msg_lines))
+        # MERGE_HEAD marks the merge as in progress, so it appears last and
+        # atomically, once the other files are in place
+        merge_head_tmp = lit_dir / 'MERGE_HEAD.tmp'
+        merge_head_tmp.write_text(theirs_hash + '\n')
+        os.replace(merge_head_tmp, lit_dir / 'MERGE_HEAD')
     
     def clear_merge_state(self) -> None:
         """Clear merge state files."""
-        merge_head = self.repo.lit_dir / 'MERGE_HEAD'
-        merge_mode = self.repo.lit_dir / 'MERGE_MODE'
-        merge_msg = self.repo.lit_dir / 'MERGE_MSG'
-        
-        if merge_head.exists():
-            merge_head.unlink()
-        if merge_mode.exists():
-            merge_mode.unlink()
-        if merge_msg.exists():
-            merge_msg.unlink()
+        # MERGE_HEAD first, so an interrupted clear leaves no merge in progress
+        for name in ('MERGE_HEAD', 'MERGE_MODE', 'MERGE_MSG'):
+            (self.repo.lit_dir / name).unlink(missing_ok=True)
     
     def is_merge_in_progress(self) -> bool:
         """Check if a merge is in progress."""
@@ -698,10 +1031,10 @@ class MergeEngine:
     
     def get_merge_head(self) -> Optional[str]:
         """Get the commit hash being merged (from MERGE_HEAD)."""
-        merge_head = self.repo.lit_dir / 'MERGE_HEAD'
-        if merge_head.exists():
-            return merge_head.read_text().strip()
-        return None
+        try:
+            return (self.repo.lit_dir / 'MERGE_HEAD').read_text().strip()
+        except FileNotFoundError:
+            return None
     
     def abort_merge(self) -> bool:
         """
@@ -749,6 +1082,15 @@ class MergeEngine:
         Returns:
             MergeResult with status and any conflicts
         """
+        try:
+            return self._merge(target_branch, allow_fast_forward, auto_strategy)
+        finally:
+            # History walks are only memoized for one merge
+            self._ancestor_cache.clear()
+            self._merge_base_cache.clear()
+    
+    def _merge(self, target_branch: str, allow_fast_forward: bool, auto_strategy: Optional[str]) -> MergeResult:
+        """Merge target branch into current branch; see merge()."""
         # Get current HEAD
         current_hash = self.repo.refs.resolve_head()
         if not current_hash:
@@ -0,0 +1,410 @@
+"""Myers O(ND) difference algorithm for line sequences.
+
+Produces difflib-compatible opcodes without going through SequenceMatcher
+or the unified_diff text format.
+"""
+
+import threading
+import warnings
+from array import array
+from difflib import SequenceMatcher
+from math import isqrt
+from typing import List, Optional, Sequence, Tuple
+
+# Numba is optional: when installed, large edit-distance searches run as
+# JIT-compiled code over int32 line ids instead of interpreted Python
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# (tag, i1, i2, j1, j2) with the same meaning as difflib opcodes
+Opcode = Tuple[str, int, int, int, int]
+
+# Largest edit cost the search runs to. Time and trace memory grow with
+# the square of the cost, so heavier rewrites are given up on
+MAX_EDIT_COST = 256
+# The compiled search is fast enough to go further; its trace is int32
+_JIT_MAX_EDIT_COST = 2048
+
+# Searches over fewer matchable lines than this stay in Python: compiling
+# the kernel, or loading it from numba's cache, costs more than it saves
+JIT_MIN_LINES = 500
+
+
+def myers_diff(a: Sequence, b: Sequence) -> List[Opcode]:
+    """
+    Compute the opcodes that turn sequence a into sequence b.
+    
+    Changes costing more than MAX_EDIT_COST edits are matched with
+    difflib's SequenceMatcher instead, which is fast on heavy rewrites
+    but not always minimal.
+    
+    Args:
+        a: Old sequence (e.g. list of lines)
+        b: New sequence
+    
+    Returns:
+        List of (tag, i1, i2, j1, j2) opcodes where tag is one of
+        'equal', 'replace', 'delete' or 'insert'
+    """
+    return _diff(a, b, fallback=True)
+
+
+def bounded_myers_diff(a: Sequence, b: Sequence) -> Optional[List[Opcode]]:
+    """
+    Like myers_diff, but give up instead of falling back to difflib.
+    
+    Returns:
+        Opcodes, or None if the change costs more than MAX_EDIT_COST edits
+    """
+    return _diff(a, b, fallback=False)
+
+
+def _diff(a: Sequence, b: Sequence, fallback: bool) -> Optional[List[Opcode]]:
+    """Opcodes for a -> b; over the edit cost cap, difflib's or None."""
+    n, m = len(a), len(b)
+    
+    # Trim the common prefix and suffix; edits usually touch a small middle
+    # region and only that part needs the search
+    prefix = 0
+    while prefix < n and prefix < m and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and suffix < m - prefix and a[n - 1 - suffix] == b[m - 1 - suffix]:
+        suffix += 1
+    
+    blocks = []
+    if prefix:
+        blocks.append((0, 0, prefix))
+    if prefix + suffix < n and prefix + suffix < m:
+        a_middle, b_middle = a[prefix:n - suffix], b[prefix:m - suffix]
+        middle = _search_blocks(a_middle, b_middle)
+        if middle is None:
+            if not fallback:
+                return None
+            middle = SequenceMatcher(None, a_middle, b_middle).get_matching_blocks()[:-1]
+        blocks.extend((i + prefix, j + prefix, size) for i, j, size in middle)
+    if suffix:
+        blocks.append((n - suffix, m - suffix, suffix))
+    
+    return _opcodes_from_blocks(blocks, n, m)
+
+
+def _search_blocks(a: Sequence, b: Sequence) -> Optional[List[Tuple[int, int, int]]]:
+    """
+    Run the Myers search and return the matching blocks of a and b.
+    
+    Returns:
+        List of (i, j, size) runs, or None if the edit cost is over the cap
+    """
+    # Compare small integer ids instead of the lines themselves
+    ids_a, ids_b = _intern(a, b)
+    
+    # Lines found on only one side can never be part of a match, so they
+    # are left out of the search and come back as plain edits afterwards
+    keep_a, keep_b = _matchable(ids_a, ids_b)
+    sub_a = [ids_a[i] for i in keep_a]
+    sub_b = [ids_b[j] for j in keep_b]
+    
+    jit_trace = _jit_kernel() if len(sub_a) + len(sub_b) >= JIT_MIN_LINES else None
+    if jit_trace is not None:
+        max_cost = _JIT_MAX_EDIT_COST
+    else:
+        max_cost = MAX_EDIT_COST
+    
+    # The edit cost is at least the length difference
+    if abs(len(sub_a) - len(sub_b)) > max_cost:
+        return None
+    
+    if jit_trace is not None:
+        trace = jit_trace(np.asarray(sub_a, dtype=np.int32), np.asarray(sub_b, dtype=np.int32), max_cost)
+        if not len(trace):
+            return None
+    else:
+        trace = _trace(sub_a, sub_b, max_cost)
+        if trace is None:
+            return None
+    
+    blocks = _backtrack(trace, len(sub_a), len(sub_b))
+    if len(keep_a) != len(a) or len(keep_b) != len(b):
+        blocks = _remap_blocks(blocks, keep_a, keep_b)
+    
+    return blocks
+
+
+def _intern(a: Sequence, b: Sequence) -> Tuple[List[int], List[int]]:
+    """Map every distinct element of a and b to a small integer id."""
+    vocab = {}
+    ids_a = [vocab.setdefault(item, len(vocab)) for item in a]
+    ids_b = [vocab.setdefault(item, len(vocab)) for item in b]
+    return ids_a, ids_b
+
+
+def _matchable(ids_a: List[int], ids_b: List[int]) -> Tuple[List[int], List[int]]:
+    """Indices of the ids in each sequence that also occur in the other."""
+    in_a = set(ids_a)
+    in_b = set(ids_b)
+    keep_a = [i for i, item in enumerate(ids_a) if item in in_b]
+    keep_b = [j for j, item in enumerate(ids_b) if item in in_a]
+    return keep_a, keep_b
+
+
+def _remap_blocks(blocks: List[Tuple[int, int, int]], keep_a: List[int],
+                  keep_b: List[int]) -> List[Tuple[int, int, int]]:
+    """
+    Translate matching blocks over the filtered sequences back to the
+    original indices, splitting runs where dropped lines sat in between.
+    """
+    remapped = []
+    for i, j, size in blocks:
+        for k in range(size):
+            x, y = keep_a[i + k], keep_b[j + k]
+            if remapped:
+                last_x, last_y, last_size = remapped[-1]
+                if last_x + last_size == x and last_y + last_size == y:
+                    remapped[-1] = (last_x, last_y, last_size + 1)
+                    continue
+            remapped.append((x, y, 1))
+    return remapped
+
+
+def _trace(a: Sequence, b: Sequence, max_cost: int) -> Optional[array]:
+    """
+    Run the forward Myers search and record its trace.
+    
+    The furthest-reaching x for every diagonal k lives in one flat int
+    array indexed by k + offset. After each edit distance d the band of
+    diagonals -d..d is appended to a single flat trace array, so band d
+    starts at offset d * d and no per-step sequence copies are made.
+    
+    Args:
+        a: Old sequence
+        b: New sequence
+        max_cost: Edit distance to give up after
+    
+    Returns:
+        Flat trace, whose length is (D + 1) ** 2 for edit distance D, or
+        None if D is over max_cost
+    """
+    n, m = len(a), len(b)
+    max_d = min(n + m, max_cost)
+    offset = max_d + 1
+    v = array('i', [0]) * (2 * max_d + 3)
+    trace = array('i')
+    
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            
+            v[offset + k] = x
+            
+            if x >= n and y >= m:
+                trace.extend(v[offset - d:offset + d + 1])
+                return trace
+        
+        trace.extend(v[offset - d:offset + d + 1])
+    
+    return None
+
+
+def _trace_int32(a, b, max_cost):
+    """Same search as _trace over int32 arrays, written for numba; empty if over max_cost."""
+    n = a.shape[0]
+    m = b.shape[0]
+    max_d = min(n + m, max_cost)
+    offset = max_d + 1
+    v = np.zeros(2 * max_d + 3, dtype=np.int32)
+    trace = np.empty(64, dtype=np.int32)
+    used = 0
+    
+    for d in range(max_d + 1):
+        done = False
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            
+            v[offset + k] = x
+            
+            if x >= n and y >= m:
+                done = True
+                break
+        
+        # Grow the trace geometrically
+        size = 2 * d + 1
+        if used + size > trace.shape[0]:
+            grown = np.empty(max(2 * trace.shape[0], used + size), dtype=np.int32)
+            grown[:used] = trace[:used]
+            trace = grown
+        trace[used:used + size] = v[offset - d:offset + d + 1]
+        used += size
+        
+        if done:
+            return trace[:used]
+    
+    return trace[:0]
+
+
+# Compiled _trace_int32, built by _jit_kernel on the first large search
+_jit_trace = None
+_jit_lock = threading.Lock()
+_jit_warned = False
+
+
+def _jit_kernel():
+    """
+    Compile the numba kernel on first use, so commands that never diff a
+    large file don't pay for it.
+    
+    Returns:
+        The compiled search, or None if numba or numpy is not installed
+    """
+    global _jit_trace, _jit_warned
+    
+    if _jit_trace is not None:
+        return _jit_trace
+    
+    with _jit_lock:
+        if _jit_trace is None:
+            if njit is None or np is None:
+                if not _jit_warned:
+                    _jit_warned = True
+                    # Hidden by default: the pure-Python search is correct,
+                    # only slower
+                    warnings.warn(
+                        "numba is not installed; large diffs use the pure-Python Myers search",
+                        ImportWarning,
+                    )
+                return None
+            
+            # Explicit signature compiles right away, once per process;
+            # cache=True keeps the machine code on disk so later processes
+            # skip the compile. nogil lets diffs running on several threads
+            # search in parallel
+            _jit_trace = njit('int32[:](int32[:], int32[:], int64)', cache=True, nogil=True)(_trace_int32)
+    
+    return _jit_trace
+
+
+def _backtrack(trace: Sequence[int], n: int, m: int) -> List[Tuple[int, int, int]]:
+    """
+    Walk the trace back from (n, m) collecting snakes.
+    
+    Returns:
+        List of (i, j, size) runs where a[i:i+size] == b[j:j+size],
+        in increasing order
+    """
+    blocks = []
+    x, y = n, m
+    
+    for d in range(isqrt(len(trace)) - 1, 0, -1):
+        # Band d-1 starts at (d-1)**2 and holds diagonals -(d-1)..(d-1)
+        base = (d - 1) * (d - 1) + d - 1
+        k = x - y
+        
+        if k == -d or (k != d and trace[base + k - 1] < trace[base + k + 1]):
+            prev_k = k + 1
+            mid_x = int(trace[base + prev_k])
+        else:
+            prev_k = k - 1
+            mid_x = int(trace[base + prev_k]) + 1
+        
+        if x > mid_x:
+            blocks.append((mid_x, mid_x - k, x - mid_x))
+        
+        x = int(trace[base + prev_k])
+        y = x - prev_k
+    
+    # Remaining snake from the origin
+    if x > 0:
+        blocks.append((0, 0, x))
+    
+    blocks.reverse()
+    return blocks
+
+
+def _opcodes_from_blocks(blocks: List[Tuple[int, int, int]], n: int, m: int) -> List[Opcode]:
+    """Convert matching blocks into opcodes, like SequenceMatcher.get_opcodes."""
+    opcodes = []
+    i = j = 0
+    
+    for ai, bj, size in blocks + [(n, m, 0)]:
+        if i < ai and j < bj:
+            opcodes.append(('replace', i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(('delete', i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(('insert', i, ai, j, bj))
+        
+        if size:
+            opcodes.append(('equal', ai, ai + size, bj, bj + size))
+        
+        i, j = ai + size, bj + size
+    
+    return opcodes
+
+
+def group_opcodes(opcodes: List[Opcode], context: int = 3) -> List[List[Opcode]]:
+    """
+    Split opcodes into hunks with up to `context` lines of context.
+    
+    Mirrors SequenceMatcher.get_grouped_opcodes, so hunk boundaries match
+    what difflib.unified_diff would produce.
+    
+    Args:
+        opcodes: Opcodes from myers_diff
+        context: Number of unchanged lines around each change
+    
+    Returns:
+        List of opcode groups, one per hunk (empty if nothing changed)
+    """
+    codes = list(opcodes)
+    if not codes:
+        return []
+    
+    # Trim leading and trailing context
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = (tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2)
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = (tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context))
+    
+    span = context + context
+    groups = []
+    group = []
+    
+    for tag, i1, i2, j1, j2 in codes:
+        # Split at long runs of unchanged lines
+        if tag == 'equal' and i2 - i1 > span:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        groups.append(group)
+    
+    return groups
@@ -1,22 +1,56 @@
 """Stash implementation for Lit VCS."""
 
+import hashlib
 import json
+import os
+import stat
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 from typing import Optional, List, Dict, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 
 from lit.core.index import Index
+from lit.core.objects import Tree, TreeEntry
+from lit.operations.diff import RACY_WINDOW_NS
 
+# orjson parses and writes the stash file straight from and to bytes when
+# installed; the file format is the same either way
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+
+# Working tree directory -> [stat signature, tree hash] cache, inside .lit
+CACHE_TREE_FILE = 'cache-tree.json'
+
+# Index file stat data -> index tree hash record, inside .lit
+INDEX_TREE_CACHE_FILE = 'index-tree-cache.json'
+
+# Number of files to hash above which blobs are written on a thread pool
+PARALLEL_HASH_THRESHOLD = 8
+
+
+def _mode_string(mode: int) -> str:
+    """Normalize a file mode to a tree entry mode."""
+    return '100755' if mode & 0o111 else '100644'
+
+
+@dataclass(frozen=True)
 class StashEntry:
     """
     Represents a single stash entry.
     
     Stores the index state, working tree changes, and metadata
-    about when and where the stash was created.
+    about when and where the stash was created. Entries are immutable
+    and slotted, since a stash list can hold many of them.
     """
+    __slots__ = ('message', 'branch', 'commit', 'timestamp', 'index_tree', 'work_tree')
+    
     message: str                    # User-provided or auto-generated message
     branch: str                     # Branch stash was created on
     commit: str                     # HEAD commit at time of stash
@@ -30,7 +64,14 @@ class StashEntry:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
-        return asdict(self)
+        return {
+            'message': self.message,
+            'branch': self.branch,
+            'commit': self.commit,
+            'timestamp': self.timestamp,
+            'index_tree': self.index_tree,
+            'work_tree': self.work_tree,
+        }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'StashEntry':
@@ -58,6 +99,9 @@ class StashManager:
         """
         self.repo = repo
         self.stash_file = repo.lit_dir / 'stash.json'
+        self._tree_files_cache: Dict[str, Dict[str, str]] = {}
+        self._cache_tree: Optional[Dict[str, list]] = None
+        self._cache_tree_dirty = False
     
     def _get_index(self) -> Index:
         """Load and return the current index."""
@@ -68,74 +112,121 @@ class StashManager:
     
     def _load_stashes(self) -> List[StashEntry]:
         """Load stash stack from disk."""
-        if not self.stash_file.exists():
+        try:
+            raw = self.stash_file.read_bytes()
+        except FileNotFoundError:
             return []
         
         try:
-            data = json.loads(self.stash_file.read_text())
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
             return [StashEntry.from_dict(entry) for entry in data]
-        except (json.JSONDecodeError, KeyError):
+        except (ValueError, KeyError, TypeError):
             return []
     
     def _save_stashes(self, stashes: List[StashEntry]) -> None:
         """Save stash stack to disk."""
         data = [entry.to_dict() for entry in stashes]
-        self.stash_file.write_text(json.dumps(data, indent=2))
+        if orjson is not None:
+            self.stash_file.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            self.stash_file.write_text(json.dumps(data, indent=2))
     
     def _build_tree_from_index(self) -> str:
         """
         Build a tree object from current index state.
         
+        The tree only depends on the index contents, so while the index
+        file keeps the stat data recorded with the last tree built from it,
+        that tree hash is reused without reading the index. Otherwise the
+        index is read and its rows fingerprinted; an index rewritten with
+        the same entries still reuses the tree without writing it again.
+        
         Returns:
             str: Tree hash
         """
-        from lit.core.objects import Tree, Blob
+        signature = self._index_signature()
+        cached = self._load_index_tree_cache()
+        cached_tree = cached.get('tree', "")
+        cached_valid = not cached_tree or self.repo.object_exists(cached_tree)
+        if signature is not None and cached.get('index') == signature and cached_valid:
+            return cached_tree
         
         index = self._get_index()
+        fingerprint = self._index_fingerprint(index)
+        if cached.get('rows') == fingerprint and cached_valid:
+            tree_hash = cached_tree
+        else:
+            tree_hash = self._write_index_tree(index)
+        
+        self._save_index_tree_cache({'index': signature, 'rows': fingerprint, 'tree': tree_hash})
+        return tree_hash
+    
+    def _index_fingerprint(self, index: Index) -> str:
+        """Digest of the (path, sha1, mode) rows of an index."""
+        hasher = hashlib.sha1()
+        for path, entry in sorted(index.entries.items()):
+            hasher.update(f"{path}\0{entry.sha1}\0{entry.mode:o}\n".encode())
+        return hasher.hexdigest()
+    
+    def _write_index_tree(self, index: Index) -> str:
+        """
+        Write the tree objects for the index entries.
+        
+        Entries are kept in flat (parent_dir, name, mode, type, hash)
+        rows bucketed by directory depth. Each level is sorted once and
+        grouped by parent directory, starting at the deepest one; every
+        group becomes a tree whose row joins the level above it.
+        """
         if not index.entries:
             return ""
         
-        # Build tree structure from index entries
-        root = {}
-        
+        levels = defaultdict(list)
         for path, entry in index.entries.items():
-            parts = path.split('/')
-            current = root
-            
-            # Navigate/create directories
-            for part in parts[:-1]:
-                if part not in current:
-                    current[part] = {}
-                current = current[part]
-            
-            # Add file entry
-            filename = parts[-1]
-            current[filename] = (entry.sha1, entry.mode)
-        
-        return self._write_tree_recursive(root)
+            parent, _, name = path.rpartition('/')
+            depth = parent.count('/') + 1 if parent else 0
+            levels[depth].append((parent, name, _mode_string(entry.mode), 'blob', entry.sha1))
+        
+        for depth in range(max(levels), -1, -1):
+            for parent, rows in groupby(sorted(levels.pop(depth, ())), key=itemgetter(0)):
+                tree = Tree()
+                tree.entries = [TreeEntry(mode, obj_type, sha1, name) for _, name, mode, obj_type, sha1 in rows]
+                tree_hash = self.repo.write_object(tree)
+                if depth:
+                    grandparent, _, name = parent.rpartition('/')
+                    levels[depth - 1].append((grandparent, name, '040000', 'tree', tree_hash))
+        
+        return tree_hash
     
-    def _write_tree_recursive(self, node: dict) -> str:
-        """Recursively write tree objects."""
-        from lit.core.objects import Tree
-        
-        tree = Tree()
-        
-        for name, value in sorted(node.items()):
-            if isinstance(value, tuple):
-                # It's a file (blob)
-                sha1, mode = value
-                # Normalize mode
-                if mode & 0o111:  # Executable
-                    mode_str = '100755'
-                else:
-                    mode_str = '100644'
-                tree.add_entry(mode_str, 'blob', sha1, name)
-            else:
-                # It's a directory (subtree)
-                subtree_hash = self._write_tree_recursive(value)
-                tree.add_entry('040000', 'tree', subtree_hash, name)
+    def _index_signature(self) -> Optional[list]:
+        """
+        Stat data identifying the current index file.
         
-        return self.repo.write_object(tree)
+        Returns:
+            [mtime_ns, size, inode], or None if the index is missing or was
+            written within the racy window
+        """
+        try:
+            st = os.stat(self.repo.index_file)
+        except OSError:
+            return None
+        if st.st_mtime_ns >= time.time_ns() - RACY_WINDOW_NS:
+            return None
+        return [st.st_mtime_ns, st.st_size, st.st_ino]
+    
+    def _load_index_tree_cache(self) -> Dict[str, Any]:
+        """Load the last index tree record, empty if missing or invalid."""
+        try:
+            data = json.loads((self.repo.lit_dir / INDEX_TREE_CACHE_FILE).read_text())
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+    
+    def _save_index_tree_cache(self, record: Dict[str, Any]) -> None:
+        """Persist the index tree record; it is only a cache."""
+        try:
+            (self.repo.lit_dir / INDEX_TREE_CACHE_FILE).write_text(json.dumps(record))
+        except OSError:
+            pass
     
     def _build_tree_from_workdir(self) -> str:
         """
@@ -143,11 +234,13 @@ class StashManager:
         
         Only includes tracked files (files in index or last commit).
         
+        Directories whose tracked files all have the same stat data as
+        when their tree was last built reuse that tree from the cache-tree
+        file, without reading or hashing any of their files.
+        
         Returns:
             str: Tree hash
         """
-        from lit.core.objects import Tree, Blob
-        
         index = self._get_index()
         
         # Get tracked files from index
@@ -161,36 +254,162 @@ class StashManager:
                 tree_files = self._get_tree_files(commit.tree)
                 tracked_files.update(tree_files.keys())
         
-        # Build tree from working directory
+        # Stat every tracked file once and arrange them by directory
         root = {}
         
         for path in tracked_files:
-            full_path = self.repo.work_tree / path
-            if not full_path.exists() or not full_path.is_file():
+            try:
+                st = os.stat(self.repo.work_tree / path)
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode):
                 continue
-            
-            # Create blob for file
-            blob = Blob.from_file(str(full_path))
-            sha1 = self.repo.write_object(blob)
-            mode = full_path.stat().st_mode
             
             parts = path.split('/')
             current = root
             
             # Navigate/create directories
             for part in parts[:-1]:
-                if part not in current:
-                    current[part] = {}
-                current = current[part]
+                current = current.setdefault(part, {})
             
             # Add file entry
-            filename = parts[-1]
-            current[filename] = (sha1, mode)
+            current[parts[-1]] = st
         
         if not root:
             return ""
         
-        return self._write_tree_recursive(root)
+        signatures = {}
+        self._stat_signature(root, '', signatures)
+        
+        # Find the cached subtrees, then hash every remaining file at once
+        reused = {}
+        paths = []
+        self._plan_workdir_tree(root, '', signatures, reused, paths)
+        blob_hashes = self._write_blobs(paths)
+        
+        tree_hash = self._write_workdir_tree(root, '', reused, signatures, blob_hashes)
+        self._save_cache_tree()
+        return tree_hash
+    
+    def _stat_signature(self, node: dict, prefix: str, signatures: Dict[str, Optional[str]]) -> Optional[str]:
+        """
+        Digest the stat data of every file below a directory.
+        
+        Records the digest of each directory in signatures. Directories
+        holding a file modified within the racy window get None, since a
+        same-size rewrite there could go unnoticed.
+        
+        Returns:
+            Digest for node, or None if it must not be cached
+        """
+        lines = []
+        cacheable = True
+        racy_cutoff = time.time_ns() - RACY_WINDOW_NS
+        
+        for name, value in sorted(node.items()):
+            if isinstance(value, dict):
+                digest = self._stat_signature(value, f"{prefix}{name}/", signatures)
+                cacheable = cacheable and digest is not None
+                lines.append(f"{name}/ {digest}")
+            else:
+                cacheable = cacheable and value.st_mtime_ns < racy_cutoff
+                lines.append(f"{name} {value.st_mtime_ns} {value.st_size} {value.st_ino} {value.st_mode}")
+        
+        signature = hashlib.sha1('\n'.join(lines).encode()).hexdigest() if cacheable else None
+        signatures[prefix] = signature
+        return signature
+    
+    def _plan_workdir_tree(self, node: dict, prefix: str, signatures: Dict[str, Optional[str]],
+                           reused: Dict[str, str], paths: List[str]) -> None:
+        """
+        Split a working tree directory into cached subtrees and files to hash.
+        
+        Args:
+            node: Directory node (name -> child node or stat result)
+            prefix: Path of the directory, ending in '/' (empty at root)
+            signatures: Stat digests from _stat_signature
+            reused: Filled with prefix -> tree hash for cache hits
+            paths: Filled with the paths of files that must be hashed
+        """
+        signature = signatures[prefix]
+        cached = self._load_cache_tree().get(prefix)
+        if (signature is not None and cached is not None and cached[0] == signature
+                and self.repo.object_exists(cached[1])):
+            reused[prefix] = cached[1]
+            return
+        
+        for name, value in node.items():
+            if isinstance(value, dict):
+                self._plan_workdir_tree(value, f"{prefix}{name}/", signatures, reused, paths)
+            else:
+                paths.append(prefix + name)
+    
+    def _write_blobs(self, paths: List[str]) -> Dict[str, str]:
+        """
+        Write working tree files as blobs.
+        
+        Reading, hashing and compressing release the GIL, so many files
+        are written on a thread pool. Large files are streamed rather
+        than read whole (see Repository.write_blob_file).
+        
+        Returns:
+            Dict mapping path -> blob hash
+        """
+        def write_blob(path):
+            return path, self.repo.write_blob_file(str(self.repo.work_tree / path))
+        
+        if len(paths) > PARALLEL_HASH_THRESHOLD:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                return dict(pool.map(write_blob, paths, chunksize=32))
+        return dict(map(write_blob, paths))
+    
+    def _write_workdir_tree(self, node: dict, prefix: str, reused: Dict[str, str],
+                            signatures: Dict[str, Optional[str]], blob_hashes: Dict[str, str]) -> str:
+        """Write the tree for a working tree directory from planned results."""
+        if prefix in reused:
+            return reused[prefix]
+        
+        tree = Tree()
+        
+        for name, value in sorted(node.items()):
+            if isinstance(value, dict):
+                subtree_hash = self._write_workdir_tree(value, f"{prefix}{name}/", reused, signatures, blob_hashes)
+                tree.add_entry('040000', 'tree', subtree_hash, name)
+            else:
+                tree.add_entry(_mode_string(value.st_mode), 'blob', blob_hashes[prefix + name], name)
+        
+        tree_hash = self.repo.write_object(tree)
+        
+        signature = signatures[prefix]
+        if signature is not None:
+            self._load_cache_tree()[prefix] = [signature, tree_hash]
+            self._cache_tree_dirty = True
+        
+        return tree_hash
+    
+    def _load_cache_tree(self) -> Dict[str, list]:
+        """Load the cache-tree from disk on first use."""
+        if self._cache_tree is None:
+            self._cache_tree = {}
+            cache_file = self.repo.lit_dir / CACHE_TREE_FILE
+            if cache_file.exists():
+                try:
+                    self._cache_tree = json.loads(cache_file.read_text())
+                except (OSError, ValueError):
+                    pass
+        return self._cache_tree
+    
+    def _save_cache_tree(self) -> None:
+        """Persist the cache-tree if it changed."""
+        if not self._cache_tree_dirty:
+            return
+        
+        cache_file = self.repo.lit_dir / CACHE_TREE_FILE
+        try:
+            cache_file.write_text(json.dumps(self._cache_tree))
+        except OSError:
+            pass
+        self._cache_tree_dirty = False
     
     def _get_tree_files(self, tree_hash: str, prefix: str = "") -> Dict[str, str]:
         """
@@ -199,20 +418,53 @@ class StashManager:
         Returns:
             Dict mapping path -> sha1
         """
-        files = {}
-        tree = self.repo.read_object(tree_hash)
-        
-        if not tree:
-            return files
-        
-        for entry in tree.entries:
-            path = f"{prefix}{entry.name}" if not prefix else f"{prefix}/{entry.name}"
-            if entry.type == 'blob':
-                files[path] = entry.hash
-            elif entry.type == 'tree':
-                files.update(self._get_tree_files(entry.hash, path))
+        files = self._tree_files(tree_hash)
+        if not prefix:
+            return dict(files)
+        return {f"{prefix}/{path}": sha1 for path, sha1 in files.items()}
+    
+    def _tree_files(self, tree_hash: str) -> Dict[str, str]:
+        """
+        Get {relative_path: sha1} for a tree, memoized by tree hash.
         
-        return files
+        Trees are immutable once hashed, so the HEAD tree walked by several
+        steps of one stash command (and subtrees shared between trees) is
+        only read once. Walks with an explicit stack, so deep trees do not
+        hit the recursion limit. The returned dict is the cached one and
+        must not be modified.
+        """
+        cache = self._tree_files_cache
+        loaded = {}
+        stack = [tree_hash]
+        
+        while stack:
+            current = stack[-1]
+            if current in cache:
+                stack.pop()
+                continue
+            
+            if current not in loaded:
+                tree = self.repo.read_object(current)
+                loaded[current] = tree.entries if isinstance(tree, Tree) else []
+            entries = loaded[current]
+            
+            # Subtrees first, then this tree from their listings
+            missing = [e.hash for e in entries if e.type == 'tree' and e.hash not in cache]
+            if missing:
+                stack.extend(missing)
+                continue
+            
+            stack.pop()
+            files = {}
+            for entry in entries:
+                if entry.type == 'blob':
+                    files[entry.name] = entry.hash
+                elif entry.type == 'tree':
+                    for path, sha1 in cache[entry.hash].items():
+                        files[f"{entry.name}/{path}"] = sha1
+            cache[current] = files
+        
+        return cache[tree_hash]
     
     def save(self, message: Optional[str] = None, keep_index: bool = False) -> Optional[StashEntry]:
         """
@@ -225,21 +477,13 @@ class StashManager:
         Returns:
             StashEntry if successful, None if nothing to stash
         """
-        from lit.core.objects import Commit
-        
         # Check if there are changes to stash
-        index = self._get_index()
-        head = self.repo.refs.resolve_head()
+        branch, head = self.repo.refs.head_state()
         
         if not head:
             return None
         
-        # Get current branch
-        head_content = (self.repo.lit_dir / 'HEAD').read_text().strip()
-        if head_content.startswith('ref: refs/heads/'):
-            branch = head_content[16:]
-        else:
-            branch = "(detached)"
+        branch = branch or "(detached)"
         
         # Build trees for index and working directory
         index_tree = self._build_tree_from_index()
@@ -293,29 +537,34 @@ class StashManager:
         
         # Restore files from tree
         tree_files = self._get_tree_files(commit.tree)
+        self._make_parent_dirs(tree_files)
         
         for path, sha1 in tree_files.items():
             # Restore file content
             blob = self.repo.read_object(sha1)
             if blob:
                 full_path = self.repo.work_tree / path
-                full_path.parent.mkdir(parents=True, exist_ok=True)
                 full_path.write_bytes(blob.data)
                 
                 # Add to index
-                stat = full_path.stat()
+                st = os.stat(full_path)
                 index.add_entry(
                     path=path,
                     sha1=sha1,
-                    mode=stat.st_mode,
-                    size=stat.st_size,
-                    mtime=int(stat.st_mtime),
-                    ctime=int(stat.st_ctime)
+                    mode=st.st_mode,
+                    size=st.st_size,
+                    mtime=int(st.st_mtime),
+                    ctime=int(st.st_ctime)
                 )
         
         # Write index
         index.write(str(self.repo.index_file))
     
+    def _make_parent_dirs(self, paths) -> None:
+        """Create the parent directories of paths, once per directory."""
+        for directory in sorted({os.path.dirname(path) for path in paths} - {''}):
+            os.makedirs(self.repo.work_tree / directory, exist_ok=True)
+    
     def list(self) -> List[StashEntry]:
         """
         List all stash entries.
@@ -346,12 +595,12 @@ class StashManager:
         # Restore working tree from stash
         if entry.work_tree:
             work_files = self._get_tree_files(entry.work_tree)
+            self._make_parent_dirs(work_files)
             
             for path, sha1 in work_files.items():
                 blob = self.repo.read_object(sha1)
                 if blob:
                     full_path = self.repo.work_tree / path
-                    full_path.parent.mkdir(parents=True, exist_ok=True)
                     full_path.write_bytes(blob.data)
         
         # Restore index from stash
@@ -360,17 +609,18 @@ class StashManager:
             index_files = self._get_tree_files(entry.index_tree)
             
             for path, sha1 in index_files.items():
-                full_path = self.repo.work_tree / path
-                if full_path.exists():
-                    stat = full_path.stat()
-                    index_obj.add_entry(
-                        path=path,
-                        sha1=sha1,
-                        mode=stat.st_mode,
-                        size=stat.st_size,
-                        mtime=int(stat.st_mtime),
-                        ctime=int(stat.st_ctime)
-                    )
+                try:
+                    st = os.stat(self.repo.work_tree / path)
+                except FileNotFoundError:
+                    continue
+                index_obj.add_entry(
+                    path=path,
+                    sha1=sha1,
+                    mode=st.st_mode,
+                    size=st.st_size,
+                    mtime=int(st.st_mtime),
+                    ctime=int(st.st_ctime)
+                )
             
             index_obj.write(str(self.repo.index_file))
         
@@ -1,10 +1,106 @@
 """Remote repository operations for Lit VCS."""
 
+import io
+import os
 import shutil
 import configparser
 from pathlib import Path
 from typing import Optional, Dict, List
 from lit.core.repository import Repository
+from lit.core.objects import Blob, Tree, Commit
+from lit.core.index import Index
+
+
+# URL prefix -> (protocol, number of characters to strip), checked in order
+_PROTOCOL_PREFIXES = (
+    ('file://', 'file', 7),
+    ('https://', 'https', 8),
+    ('http://', 'http', 7),
+    ('ssh://', 'ssh', 6),
+    ('git@', 'ssh', 0),
+)
+
+# Ref files hold a 40-character hash plus newline, so one read covers them
+_REF_READ_SIZE = 4096
+
+
+def _read_ref_file(path: str) -> str:
+    """Read a ref file with a single open/read/close and no Path overhead."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, _REF_READ_SIZE).decode().strip()
+    finally:
+        os.close(fd)
+
+
+def _write_ref_file(path: str, commit_hash: str) -> None:
+    """Write a ref file with a single open/write/close."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, commit_hash.encode())
+    finally:
+        os.close(fd)
+
+
+def _ensure_fanout_dirs(objects_dir: str) -> None:
+    """
+    Create all 256 two-hex-digit object subdirectories up front.
+    
+    Lets object copy loops skip a mkdir call per source directory.
+    """
+    for i in range(256):
+        try:
+            os.mkdir(os.path.join(objects_dir, f"{i:02x}"))
+        except FileExistsError:
+            pass
+
+
+def _copy_objects(source: Repository, dest: Repository) -> None:
+    """
+    Copy the loose objects dest does not have yet.
+    
+    Both object databases are scanned once, so no object is stat()ed.
+    Fanout directories must already exist in dest.
+    """
+    for hash in dest.missing_objects(sorted(source.stored_objects())):
+        shutil.copy2(source.object_path(hash), dest.object_path(hash))
+
+
+def _clear_worktree(root: str) -> None:
+    """Delete everything in a working tree except the .lit directory."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.name == '.lit':
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                _remove_dir(entry.path)
+            else:
+                os.unlink(entry.path)
+
+
+def _remove_dir(path: str) -> None:
+    """
+    Remove a directory tree in one scandir pass per directory.
+    
+    Files are unlinked as they are listed and directories are removed
+    post-order from an explicit stack, avoiding the extra lstat calls
+    shutil.rmtree makes for its safety checks.
+    """
+    stack = [(path, False)]
+    
+    while stack:
+        current, emptied = stack.pop()
+        if emptied:
+            os.rmdir(current)
+            continue
+        
+        stack.append((current, True))
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, False))
+                else:
+                    os.unlink(entry.path)
 
 
 class RemoteManager:
@@ -38,8 +134,7 @@ class RemoteManager:
         config.set(section, 'url', url)
         config.set(section, 'fetch', f'+refs/heads/*:refs/remotes/{name}/*')
         
-        with open(self.repo.config_file, 'w') as f:
-            config.write(f)
+        self._write_config(config)
     
     def list_remotes(self) -> Dict[str, str]:
         """
@@ -79,8 +174,23 @@ class RemoteManager:
         
         if config.has_section(section):
             config.remove_section(section)
-            with open(self.repo.config_file, 'w') as f:
-                config.write(f)
+            self._write_config(config)
+    
+    def _write_config(self, config: configparser.ConfigParser):
+        """
+        Write config to disk in a single write and swap it into place.
+        
+        The config is rendered into memory first, written to a temporary
+        file and moved over the old one with os.replace, so readers never
+        see a half-written config.
+        """
+        buffer = io.StringIO()
+        config.write(buffer)
+        
+        tmp_file = self.repo.config_file.with_suffix('.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(buffer.getvalue().encode())
+        os.replace(tmp_file, self.repo.config_file)
     
     def _parse_url(self, url: str) -> tuple[str, str]:
         """
@@ -97,19 +207,12 @@ class RemoteManager:
             /path/to/repo -> ('file', '/path/to/repo')
             https://github.com/user/repo.git -> ('https', 'github.com/user/repo.git')
         """
-        if url.startswith('file://'):
-            return ('file', url[7:])
-        elif url.startswith('https://'):
-            return ('https', url[8:])
-        elif url.startswith('http://'):
-            return ('http', url[7:])
-        elif url.startswith('ssh://'):
-            return ('ssh', url[6:])
-        elif url.startswith('git@'):
-            return ('ssh', url)
-        else:
-            # Assume local file path
-            return ('file', url)
+        for prefix, protocol, strip in _PROTOCOL_PREFIXES:
+            if url.startswith(prefix):
+                return (protocol, url[strip:])
+        
+        # Assume local file path
+        return ('file', url)
     
     def clone(self, source_url: str, dest_path: str, remote_name: str = 'origin', 
               bare: bool = False) -> Repository:
@@ -159,7 +262,7 @@ class RemoteManager:
         dest_path.mkdir(parents=True)
         
         # Initialize new repository
-        dest_repo = Repository(str(dest_path))
+        dest_repo = Repository._from_resolved(dest_path)
         dest_repo.init()
         
         # Copy all objects
@@ -167,10 +270,10 @@ class RemoteManager:
         dest_objects = dest_repo.objects_dir
         
         if source_objects.exists():
+            _ensure_fanout_dirs(str(dest_objects))
             for obj_dir in source_objects.iterdir():
                 if obj_dir.is_dir() and len(obj_dir.name) == 2:
                     dest_obj_dir = dest_objects / obj_dir.name
-                    dest_obj_dir.mkdir(exist_ok=True)
                     for obj_file in obj_dir.iterdir():
                         shutil.copy2(obj_file, dest_obj_dir / obj_file.name)
         
@@ -236,7 +339,6 @@ class RemoteManager:
                         dest_repo.head_file.write_text(f'ref: refs/heads/{default_branch}\n')
                         
                         # Checkout the default branch
-                        from lit.core.objects import Commit
                         commit = dest_repo.read_object(commit_hash)
                         if isinstance(commit, Commit):
                             self._checkout_commit(dest_repo, commit)
@@ -245,31 +347,36 @@ class RemoteManager:
     
     def _checkout_commit(self, repo: Repository, commit):
         """Checkout a commit to the working directory."""
-        from lit.core.objects import Tree, Blob
-        from lit.core.index import Index
-        
         # Clear working directory (except .lit)
-        for item in repo.work_tree.iterdir():
-            if item.name != '.lit':
-                if item.is_file():
-                    item.unlink()
-                elif item.is_dir():
-                    shutil.rmtree(item)
-        
-        # Get tree and restore files
-        tree = repo.read_object(commit.tree)
-        if isinstance(tree, Tree):
-            self._restore_tree(repo, tree, repo.work_tree)
+        _clear_worktree(str(repo.work_tree))
         
-        # Update index
+        # Restore files and rebuild the index in a single tree walk
+        tree = repo.read_object(commit.tree)
         index = Index()
-        self._index_tree(repo, tree, index, '')
+        if isinstance(tree, Tree):
+            self._materialize_tree(repo, tree, repo.work_tree, '', index)
         index.write(str(repo.index_file))
     
+    def _materialize_tree(self, repo: Repository, tree, path: Path, prefix: str, index):
+        """
+        Recursively restore tree to working directory and add it to index.
+        
+        Does the work of _restore_tree and _index_tree in one walk, so each
+        object is read from the object store only once.
+        """
+        for entry in tree.entries:
+            entry_path = path / entry.name
+            obj = repo.read_object(entry.hash)
+            
+            if isinstance(obj, Blob):
+                entry_path.write_bytes(obj.data)
+                index.add_entry(f"{prefix}{entry.name}", entry.hash, int(entry.mode, 8), len(obj.data))
+            elif isinstance(obj, Tree):
+                entry_path.mkdir(exist_ok=True)
+                self._materialize_tree(repo, obj, entry_path, f"{prefix}{entry.name}/", index)
+    
     def _restore_tree(self, repo: Repository, tree, path: Path):
         """Recursively restore tree to working directory."""
-        from lit.core.objects import Tree, Blob
-        
         for entry in tree.entries:
             entry_path = path / entry.name
             obj = repo.read_object(entry.hash)
@@ -282,8 +389,6 @@ class RemoteManager:
     
     def _index_tree(self, repo: Repository, tree, index, prefix: str):
         """Recursively add tree entries to index."""
-        from lit.core.objects import Tree, Blob
-        
         for entry in tree.entries:
             path = f"{prefix}{entry.name}" if prefix else entry.name
             obj = repo.read_object(entry.hash)
@@ -339,16 +444,10 @@ class RemoteManager:
             raise Exception(f"Not a valid lit repository: {source}")
         
         # Copy new objects
-        source_objects = source_lit / 'objects'
-        if source_objects.exists():
-            for obj_dir in source_objects.iterdir():
-                if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                    dest_obj_dir = self.repo.objects_dir / obj_dir.name
-                    dest_obj_dir.mkdir(exist_ok=True)
-                    for obj_file in obj_dir.iterdir():
-                        dest_file = dest_obj_dir / obj_file.name
-                        if not dest_file.exists():
-                            shutil.copy2(obj_file, dest_file)
+        source_repo = Repository._from_resolved(source)
+        if source_repo.objects_dir.exists():
+            _ensure_fanout_dirs(str(self.repo.objects_dir))
+            _copy_objects(source_repo, self.repo)
         
         # Update remote-tracking branches
         source_heads = source_lit / 'refs' / 'heads'
@@ -356,16 +455,18 @@ class RemoteManager:
             remote_ref_dir = self.repo.remotes_dir / remote_name
             remote_ref_dir.mkdir(parents=True, exist_ok=True)
             
-            branches_to_fetch = [branch] if branch else [
-                b.name for b in source_heads.iterdir() if b.is_file()
-            ]
+            if branch:
+                branches_to_fetch = [(branch, os.path.join(source_heads, branch))]
+            else:
+                with os.scandir(source_heads) as entries:
+                    branches_to_fetch = [(e.name, e.path) for e in entries if e.is_file()]
             
-            for branch_name in branches_to_fetch:
-                source_branch = source_heads / branch_name
-                if source_branch.exists():
-                    commit_hash = source_branch.read_text().strip()
-                    dest_branch = remote_ref_dir / branch_name
-                    dest_branch.write_text(commit_hash)
+            for branch_name, source_branch in branches_to_fetch:
+                try:
+                    commit_hash = _read_ref_file(source_branch)
+                except OSError:
+                    continue
+                _write_ref_file(os.path.join(remote_ref_dir, branch_name), commit_hash)
     
     def push(self, remote_name: str = 'origin', branch: Optional[str] = None):
         """
@@ -420,22 +521,15 @@ class RemoteManager:
         if not dest_lit.exists():
             raise Exception(f"Not a valid lit repository: {dest}")
         
-        # Copy new objects
-        dest_objects = dest_lit / 'objects'
-        for obj_dir in self.repo.objects_dir.iterdir():
-            if obj_dir.is_dir() and len(obj_dir.name) == 2:
-                dest_obj_dir = dest_objects / obj_dir.name
-                dest_obj_dir.mkdir(exist_ok=True)
-                for obj_file in obj_dir.iterdir():
-                    dest_file = dest_obj_dir / obj_file.name
-                    if not dest_file.exists():
-                        shutil.copy2(obj_file, dest_file)
+        # Copy new objects (nothing to do when pushing to ourselves)
+        if dest != self.repo.work_tree:
+            dest_repo = Repository._from_resolved(dest)
+            _ensure_fanout_dirs(str(dest_repo.objects_dir))
+            _copy_objects(self.repo, dest_repo)
         
         # Update branch reference
-        local_ref = self.repo.heads_dir / branch
-        commit_hash = local_ref.read_text().strip()
+        commit_hash = _read_ref_file(os.path.join(self.repo.heads_dir, branch))
         
         dest_heads = dest_lit / 'refs' / 'heads'
         dest_heads.mkdir(parents=True, exist_ok=True)
-        dest_branch = dest_heads / branch
-        dest_branch.write_text(commit_hash)
+        _write_ref_file(os.path.join(dest_heads, branch), commit_hash)
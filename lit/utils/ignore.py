@@ -2,13 +2,83 @@
 
 import fnmatch
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional, Set
 
 
+# Number of path results each IgnoreMatcher keeps
+MATCH_CACHE_SIZE = 8192
+
+# Glob syntax: **/ (zero or more directories), ** (anything), * and ?
+# (within one path segment) and [...] character classes. A [ without a
+# closing ] is not a token and stays literal. The lookahead makes the
+# class opening (optional ! then optional ]) atomic, so a ] right after it
+# is never taken as the closing one
+_GLOB_TOKEN = re.compile(r'\*\*/|\*\*|\*|\?|\[(?=(!?\]?))\1[^\]]*\]')
+
+_GLOB_REGEX = {
+    '**/': '(?:.*/)?',
+    '**': '.*',
+    '*': '[^/]*',
+    '?': '[^/]',
+}
+
+
+@lru_cache(maxsize=1024)
+def _compile_pattern(pattern: str) -> re.Pattern:
+    """
+    Convert a gitignore-style pattern to a regex.
+    
+    Memoized, so matchers built for every command share the compiled
+    regex of each pattern they have in common.
+    """
+    # Check if pattern is anchored (starts with /)
+    anchored = pattern.startswith('/')
+    if anchored:
+        pattern = pattern[1:]
+    
+    regex_parts = ['^'] if anchored else []
+    end = 0
+    for match in _GLOB_TOKEN.finditer(pattern):
+        regex_parts.append(re.escape(pattern[end:match.start()]))
+        token = match.group()
+        if token[0] == '[':
+            # Character class, with ! for negation converted to ^
+            regex_parts.append('[^' + token[2:] if token[1] == '!' else token)
+        else:
+            regex_parts.append(_GLOB_REGEX[token])
+        end = match.end()
+    regex_parts.append(re.escape(pattern[end:]))
+    
+    # If not anchored and doesn't contain /, match anywhere in path
+    if not anchored and '/' not in pattern:
+        regex_str = '(?:^|/)' + ''.join(regex_parts) + '(?:/|$)'
+    else:
+        if not anchored:
+            regex_str = '(?:^|/)' + ''.join(regex_parts)
+        else:
+            regex_str = ''.join(regex_parts)
+        
+        # Match to end or followed by /
+        if not regex_str.endswith('.*'):
+            regex_str += '(?:/.*)?$'
+    
+    return re.compile(regex_str)
+
+
+def _fuse_patterns(patterns: List['IgnorePattern']) -> Optional[re.Pattern]:
+    """Combine pattern regexes into one alternation (None if there are none)."""
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{pattern._regex.pattern})' for pattern in patterns))
+
+
 class IgnorePattern:
     """Represents a single ignore pattern."""
     
+    __slots__ = ('original', 'pattern', 'negation', 'directory_only', '_regex')
+    
     def __init__(self, pattern: str, negation: bool = False, directory_only: bool = False):
         """
         Initialize an ignore pattern.
@@ -24,88 +94,7 @@ class IgnorePattern:
         self.directory_only = directory_only
         
         # Convert pattern to regex for more powerful matching
-        self._regex = self._compile_pattern(pattern)
-    
-    def _compile_pattern(self, pattern: str) -> re.Pattern:
-        """Convert a gitignore-style pattern to a regex."""
-        # Handle ** (match any path segments)
-        # Handle * (match anything except /)
-        # Handle ? (match single character except /)
-        
-        regex_parts = []
-        i = 0
-        
-        # Check if pattern is anchored (starts with /)
-        anchored = pattern.startswith('/')
-        if anchored:
-            pattern = pattern[1:]
-            regex_parts.append('^')
-        
-        while i < len(pattern):
-            c = pattern[i]
-            
-            if c == '*':
-                if i + 1 < len(pattern) and pattern[i + 1] == '*':
-                    # ** matches any path
-                    if i + 2 < len(pattern) and pattern[i + 2] == '/':
-                        # **/ matches zero or more directories
-                        regex_parts.append('(?:.*/)?')
-                        i += 3
-                    else:
-                        # ** at end matches everything
-                        regex_parts.append('.*')
-                        i += 2
-                else:
-                    # * matches anything except /
-                    regex_parts.append('[^/]*')
-                    i += 1
-            elif c == '?':
-                # ? matches single character except /
-                regex_parts.append('[^/]')
-                i += 1
-            elif c == '[':
-                # Character class - find closing ]
-                j = i + 1
-                if j < len(pattern) and pattern[j] == '!':
-                    j += 1
-                if j < len(pattern) and pattern[j] == ']':
-                    j += 1
-                while j < len(pattern) and pattern[j] != ']':
-                    j += 1
-                if j < len(pattern):
-                    # Valid character class
-                    char_class = pattern[i:j+1]
-                    # Convert ! to ^ for negation
-                    if len(char_class) > 1 and char_class[1] == '!':
-                        char_class = '[^' + char_class[2:]
-                    regex_parts.append(char_class)
-                    i = j + 1
-                else:
-                    # No closing ], treat [ as literal
-                    regex_parts.append(re.escape(c))
-                    i += 1
-            elif c == '/':
-                regex_parts.append('/')
-                i += 1
-            else:
-                # Escape other special regex chars
-                regex_parts.append(re.escape(c))
-                i += 1
-        
-        # If not anchored and doesn't contain /, match anywhere in path
-        if not anchored and '/' not in self.original.lstrip('/'):
-            regex_str = '(?:^|/)' + ''.join(regex_parts) + '(?:/|$)'
-        else:
-            if not anchored:
-                regex_str = '(?:^|/)' + ''.join(regex_parts)
-            else:
-                regex_str = ''.join(regex_parts)
-            
-            # Match to end or followed by /
-            if not regex_str.endswith('.*'):
-                regex_str += '(?:/.*)?$'
-        
-        return re.compile(regex_str)
+        self._regex = _compile_pattern(pattern)
     
     def matches(self, path: str, is_dir: bool = False) -> bool:
         """
@@ -123,20 +112,11 @@ class IgnorePattern:
         if path.startswith('./'):
             path = path[2:]
         
-        # For directory-only patterns (trailing /), we need to check
-        # if the path IS the directory or is INSIDE the directory
-        if self.directory_only:
-            # Check if path matches exactly (for directories)
-            if is_dir and self._regex.search(path):
-                return True
-            # Check if any parent directory matches
-            parts = path.split('/')
-            for i in range(len(parts)):
-                parent = '/'.join(parts[:i+1])
-                if self._regex.search(parent):
-                    return True
-            return False
-        
+        # Directory-only patterns (trailing /) match the directory and
+        # everything inside it. Compiled regexes end at '/' or the end of
+        # the string, so a regex that matches a parent directory is also
+        # found in every path below it: one search on the full path covers
+        # all the parents
         return bool(self._regex.search(path))
 
 
@@ -146,7 +126,14 @@ class IgnoreMatcher:
     def __init__(self):
         """Initialize empty matcher."""
         self.patterns: List[IgnorePattern] = []
-        self._cache: dict = {}
+        
+        # Bounded memo of recent results, and directory -> ignored verdicts
+        # used to decide files below an ignored directory without a search
+        self._cache = lru_cache(maxsize=MATCH_CACHE_SIZE)(self._match)
+        self._dir_cache: dict = {}
+        
+        # (ignore regex, negation regex), built on first use
+        self._fused: Optional[tuple] = None
     
     def add_pattern(self, pattern: str) -> None:
         """
@@ -173,7 +160,9 @@ class IgnoreMatcher:
             pattern = pattern[:-1]
         
         self.patterns.append(IgnorePattern(pattern, negation, directory_only))
-        self._cache.clear()
+        self._cache.cache_clear()
+        self._dir_cache.clear()
+        self._fused = None
     
     def add_patterns(self, patterns: List[str]) -> None:
         """Add multiple patterns."""
@@ -215,23 +204,57 @@ class IgnoreMatcher:
         Returns:
             True if the path should be ignored
         """
-        # Check cache
-        cache_key = (path, is_dir)
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-        
+        # Patterns match a directory and everything below it alike (see
+        # IgnorePattern.matches), so is_dir cannot change the result and
+        # results are cached by path alone
+        return self._cache(path)
+    
+    def _match(self, path: str) -> bool:
+        """Uncached is_ignored."""
         # Normalize path
         path = path.replace('\\', '/')
         if path.startswith('./'):
             path = path[2:]
         
-        # Check each pattern, last match wins
-        ignored = False
-        for pattern in self.patterns:
-            if pattern.matches(path, is_dir):
-                ignored = not pattern.negation
+        # One search per kind of pattern instead of one per pattern
+        ignore_regex, negation_regex = self._fused_patterns()
+        
+        # A match on a directory is a match on everything below it (see
+        # IgnorePattern.matches), so without negations the directory's
+        # verdict decides its files
+        parent = path.rpartition('/')[0]
+        if negation_regex is None and parent and self._dir_ignored(parent):
+            return True
+        
+        if ignore_regex is None or not ignore_regex.search(path):
+            ignored = False
+        elif negation_regex is None or not negation_regex.search(path):
+            ignored = True
+        else:
+            # Both kinds match: the last matching pattern wins
+            ignored = next(
+                not pattern.negation
+                for pattern in reversed(self.patterns) if pattern.matches(path)
+            )
         
-        self._cache[cache_key] = ignored
+        return ignored
+    
+    def _fused_patterns(self) -> tuple:
+        """Get (ignore regex, negation regex), building them on first use."""
+        if self._fused is None:
+            self._fused = (
+                _fuse_patterns([p for p in self.patterns if not p.negation]),
+                _fuse_patterns([p for p in self.patterns if p.negation]),
+            )
+        return self._fused
+    
+    def _dir_ignored(self, directory: str) -> bool:
+        """Whether an ignore pattern matches a directory, memoized per directory."""
+        ignored = self._dir_cache.get(directory)
+        if ignored is None:
+            ignore_regex = self._fused_patterns()[0]
+            ignored = ignore_regex is not None and bool(ignore_regex.search(directory))
+            self._dir_cache[directory] = ignored
         return ignored
     
     def filter_paths(self, paths: List[str], is_dir_func=None) -> List[str]:
@@ -1,13 +1,14 @@
 """Shared pytest fixtures for Lit tests."""
 
 import pytest
-import tempfile
-import shutil
+import io
 import os
-from pathlib import Path
-from collections import defaultdict
+import tarfile
+import tempfile
+from functools import lru_cache, partial
+from click.testing import CliRunner
 from lit.core.repository import Repository
-from lit.core.objects import Blob, Tree, Commit
+from lit.core.objects import Blob, Tree, TreeEntry, Commit
 from lit.core.index import Index
 
 
@@ -18,6 +19,24 @@ _original_cwd = os.getcwd()
 os.environ.setdefault('LIT_AUTHOR_NAME', 'Test User')
 os.environ.setdefault('LIT_AUTHOR_EMAIL', 'test@example.com')
 
+# Author and committer of every commit the fixtures create
+TEST_AUTHOR = "Test User <test@example.com>"
+_create_commit = partial(Commit.create, author=TEST_AUTHOR, committer=TEST_AUTHOR)
+
+
+# Set to a directory (e.g. /dev/shm) to keep test repositories there
+TEST_TMPDIR_ENV = "LIT_TEST_TMPDIR"
+
+
+def pytest_configure(config):
+    """Move pytest's temp root to $LIT_TEST_TMPDIR when it is set."""
+    tmp_root = os.environ.get(TEST_TMPDIR_ENV)
+    if tmp_root and os.path.isdir(tmp_root):
+        # Only the root changes: pytest still uses a numbered, per-user
+        # pytest-of-<user> directory there, so concurrent runs are safe
+        # and the last few runs are kept
+        tempfile.tempdir = tmp_root
+
 
 @pytest.fixture(autouse=True)
 def reset_cwd():
@@ -41,45 +60,60 @@ def build_tree_from_index(repo, index):
     """
     Build tree object from index entries.
     Helper function for tests - creates tree structure from index.
+    
+    Walks the sorted paths once with a stack of open directories; a
+    directory's tree is finished as soon as the walk leaves it.
     """
-    trees = defaultdict(Tree)
+    trees = []
+    # (directory path, entries) of the root and each open subdirectory
+    stack = [('', [])]
+    
+    def close_directory():
+        dir_path, entries = stack.pop()
+        tree = Tree()
+        tree.entries = sorted(entries)
+        trees.append(tree)
+        stack[-1][1].append(TreeEntry('040000', 'tree', tree.hash, dir_path.rpartition('/')[2]))
     
     for path in sorted(index.entries.keys()):
         entry = index.entries[path]
-        parts = Path(path).parts
+        dir_path, _, filename = path.rpartition('/')
         
-        for i in range(len(parts)):
-            dir_path = str(Path(*parts[:i])) if i > 0 else ''
-            trees[dir_path]
+        # Leave the directories this path is not in
+        while stack[-1][0] and not (dir_path + '/').startswith(stack[-1][0] + '/'):
+            close_directory()
         
-        dir_path = str(Path(*parts[:-1])) if len(parts) > 1 else ''
-        filename = parts[-1]
+        # Enter the directories leading down to the file
+        top = stack[-1][0]
+        if dir_path != top:
+            for name in dir_path[len(top):].lstrip('/').split('/'):
+                stack.append((f"{stack[-1][0]}/{name}" if stack[-1][0] else name, []))
         
         mode = '100755' if entry.mode & 0o111 else '100644'
-        trees[dir_path].add_entry(mode, 'blob', entry.sha1, filename)
+        stack[-1][1].append(TreeEntry(mode, 'blob', entry.sha1, filename))
+    
+    while len(stack) > 1:
+        close_directory()
     
-    for dir_path in sorted(trees.keys(), key=lambda x: x.count('/'), reverse=True):
-        if dir_path:
-            tree = trees[dir_path]
-            tree_hash = repo.write_object(tree)
-            
-            parent_parts = Path(dir_path).parts
-            parent_path = str(Path(*parent_parts[:-1])) if len(parent_parts) > 1 else ''
-            dir_name = parent_parts[-1]
-            
-            trees[parent_path].add_entry('040000', 'tree', tree_hash, dir_name)
+    root_tree = Tree()
+    root_tree.entries = sorted(stack[0][1])
+    trees.append(root_tree)
     
-    root_tree = trees['']
-    tree_hash = repo.write_object(root_tree)
-    return tree_hash
+    # Write every tree in one pass
+    repo.write_objects_bulk(trees)
+    return root_tree.hash
+
+
+@pytest.fixture(scope="session")
+def runner():
+    """CLI runner shared by the whole session; it keeps no per-test state."""
+    return CliRunner()
 
 
 @pytest.fixture
-def temp_dir():
-    """Create a temporary directory for tests."""
-    tmpdir = tempfile.mkdtemp()
-    yield Path(tmpdir)
-    shutil.rmtree(tmpdir, ignore_errors=True)
+def temp_dir(tmp_path):
+    """Create a temporary directory for tests (managed by pytest)."""
+    return tmp_path
 
 
 @pytest.fixture
@@ -90,14 +124,18 @@ def repo(temp_dir):
     return repo
 
 
-@pytest.fixture
-def repo_with_config(repo):
-    """Create a repository with config set."""
-    config_file = repo.config_file
-    config_file.write_text("""[user]
+def _write_test_config(repo):
+    """Write the test user config into a repository."""
+    repo.config_file.write_text("""[user]
 \tname = Test User
 \temail = test@example.com
 """)
+
+
+@pytest.fixture
+def repo_with_config(repo):
+    """Create a repository with config set."""
+    _write_test_config(repo)
     # Add index as a property for convenience
     repo.index = Index()
     return repo
@@ -122,52 +160,48 @@ def sample_tree(repo, sample_blob):
 def sample_commit(sample_tree, repo):
     """Sample commit object."""
     tree_hash = repo.write_object(sample_tree)
-    commit = Commit.create(
+    commit = _create_commit(
         tree_hash=tree_hash,
         parent_hashes=[],
-        author="Test User <test@example.com>",
-        committer="Test User <test@example.com>",
         message="Test commit"
     )
     return commit
 
 
-@pytest.fixture
-def repo_with_commits(repo_with_config):
-    """Repository with a couple of commits."""
-    repo = repo_with_config
+@pytest.fixture(scope="session")
+def _repo_with_commits_template(tmp_path_factory):
+    """Tar archive of the repo_with_commits work tree, built once per session."""
+    repo = Repository(str(tmp_path_factory.mktemp("template")))
+    repo.init()
+    _write_test_config(repo)
+    
     index = Index()
     
     # First commit
     file1 = repo.work_tree / "file1.txt"
     file1.write_text("Hello, World!")
     # Use pathlib object directly to avoid symlink resolution issues
-    index.add_file(repo_with_config, file1)
+    index.add_files(repo, [file1])
     
     # Create first commit
     tree_hash1 = build_tree_from_index(repo, index)
-    commit1 = Commit.create(
+    commit1 = _create_commit(
         tree_hash=tree_hash1,
         parent_hashes=[],
-        author="Test User <test@example.com>",
-        committer="Test User <test@example.com>",
         message="First commit"
     )
     commit_hash1 = repo.write_object(commit1)
-    repo.head_file.write_text(commit_hash1 + "\n")
     
     # Second commit
     file2 = repo.work_tree / "file2.txt"
     file2.write_text("Second file")
     # Use pathlib object directly
-    index.add_file(repo_with_config, file2)
+    index.add_files(repo, [file2])
     
     tree_hash2 = build_tree_from_index(repo, index)
-    commit2 = Commit.create(
+    commit2 = _create_commit(
         tree_hash=tree_hash2,
         parent_hashes=[commit_hash1],
-        author="Test User <test@example.com>",
-        committer="Test User <test@example.com>",
         message="Second commit"
     )
     commit_hash2 = repo.write_object(commit2)
@@ -176,8 +210,31 @@ def repo_with_commits(repo_with_config):
     repo.refs.write_ref("refs/heads/main", commit_hash2)
     repo.head_file.write_text("ref: refs/heads/main\n")
     
-    # Update repo.index to have current state (already written to disk by add_file)
-    repo.index = index
+    # Keep it as an uncompressed tar so each test restores it in one stream
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w') as tar:
+        tar.add(str(repo.work_tree), arcname='.')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def repo_with_commits(repo_with_config, _repo_with_commits_template):
+    """
+    Repository with a couple of commits.
+    
+    The commits are built once per session and extracted over this
+    test's freshly initialized repository.
+    """
+    repo = repo_with_config
+    with tarfile.open(fileobj=io.BytesIO(_repo_with_commits_template), mode='r') as tar:
+        if hasattr(tarfile, 'data_filter'):
+            tar.extractall(str(repo.work_tree), filter='data')
+        else:
+            tar.extractall(str(repo.work_tree))
+    
+    # Load the index the template left on disk
+    repo.index = Index()
+    repo.index.read(str(repo.index_file))
     
     return repo
 
@@ -204,6 +261,24 @@ def working_files(repo):
     }
 
 
+@lru_cache(maxsize=128)
+def _make_commit_cached(tree_hash, parents, message):
+    """
+    Create a commit, memoized by its tree, parents and message.
+    
+    A test that builds the same commit again gets the commit from the
+    first call, timestamp included, with its hash already computed.
+    """
+    return _create_commit(tree_hash=tree_hash, parent_hashes=list(parents), message=message)
+
+
+@pytest.fixture(autouse=True)
+def _clear_commit_cache():
+    """Start every test with no memoized commits, so none depends on test order."""
+    _make_commit_cached.cache_clear()
+    yield
+
+
 def make_commit(repo, message="Test commit"):
     """
     Helper function to create a commit from current index state.
@@ -228,32 +303,36 @@ def make_commit(repo, message="Test commit"):
     # Build tree from index
     tree_hash = build_tree_from_index(repo, index)
     
-    # Get parent commit
-    parent_hashes = []
-    head_hash = repo.refs.resolve_head()
-    if head_hash:
-        parent_hashes = [head_hash]
+    # Read HEAD once for both the parent commit and the branch to update
+    branch_name, head_hash = repo.refs.head_state()
+    parent_hashes = [head_hash] if head_hash else []
     
     # Create commit
-    commit = Commit.create(
-        tree_hash=tree_hash,
-        parent_hashes=parent_hashes,
-        author="Test User <test@example.com>",
-        committer="Test User <test@example.com>",
-        message=message
-    )
+    commit = _make_commit_cached(tree_hash, tuple(parent_hashes), message)
     
     # Write commit and update HEAD/branch
     commit_hash = repo.write_object(commit)
     
     # Check if HEAD points to a branch
-    head_content = repo.head_file.read_text().strip()
-    if head_content.startswith('ref: refs/heads/'):
+    if branch_name:
         # Update the branch reference
-        branch_name = head_content[16:]
         repo.refs.write_ref(f'refs/heads/{branch_name}', commit_hash)
     else:
         # Detached HEAD - just update HEAD
         repo.head_file.write_text(commit_hash + "\n")
     
     return commit_hash
+
+
+def make_graph_commit(repo, parents, timestamp, message="Test commit"):
+    """
+    Write a commit with an empty tree at the given time.
+    
+    For history tests that only care about the commit graph.
+    
+    Returns:
+        str: Commit hash
+    """
+    tree_hash = repo.write_object(Tree())
+    commit = _create_commit(tree_hash=tree_hash, parent_hashes=parents, message=message, timestamp=timestamp)
+    return repo.write_object(commit)
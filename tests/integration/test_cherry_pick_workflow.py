@@ -1,57 +1,65 @@
 """Integration tests for cherry-pick command."""
 
 import pytest
-import os
+import re
+import shutil
 from pathlib import Path
-from click.testing import CliRunner
 
 from lit.cli.main import cli
 
 
-@pytest.fixture
-def runner():
-    """Create CLI runner."""
-    return CliRunner()
+# Hash printed by a successful 'lit commit'
+_COMMIT_RE = re.compile(r'Created commit (\w+)')
 
 
-@pytest.fixture
-def repo_with_branches(runner, tmp_path):
-    """Create a repository with multiple branches and commits."""
-    os.chdir(tmp_path)
-    
-    # Initialize repo
-    result = runner.invoke(cli, ['init'])
-    assert result.exit_code == 0
-    
-    # Configure user
-    runner.invoke(cli, ['config', 'set', 'user.name', 'Test User'])
-    runner.invoke(cli, ['config', 'set', 'user.email', 'test@test.com'])
-    
-    # Create initial commit on main
-    Path('file.txt').write_text('initial content\n')
-    runner.invoke(cli, ['add', 'file.txt'])
-    runner.invoke(cli, ['commit', '-m', 'Initial commit'])
+@pytest.fixture(scope="module")
+def _branches_template(runner, tmp_path_factory):
+    """Build the repo_with_branches repository once per module."""
+    template = tmp_path_factory.mktemp("branches")
     
-    # Create feature branch
-    runner.invoke(cli, ['branch', 'feature'])
-    
-    # Add commit on main
-    Path('file.txt').write_text('initial content\nmain line\n')
-    runner.invoke(cli, ['add', 'file.txt'])
-    result = runner.invoke(cli, ['commit', '-m', 'Add main line'])
-    
-    # Extract commit hash
-    main_commit = None
-    for line in result.output.split('\n'):
-        if 'Created commit' in line:
-            main_commit = line.split()[-1]
-            break
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(template)
+        
+        # Initialize repo
+        result = runner.invoke(cli, ['init'])
+        assert result.exit_code == 0
+        
+        # Configure user
+        runner.invoke(cli, ['config', 'set', 'user.name', 'Test User'])
+        runner.invoke(cli, ['config', 'set', 'user.email', 'test@test.com'])
+        
+        # Create initial commit on main
+        Path('file.txt').write_text('initial content\n')
+        runner.invoke(cli, ['add', 'file.txt'])
+        runner.invoke(cli, ['commit', '-m', 'Initial commit'])
+        
+        # Create feature branch
+        runner.invoke(cli, ['branch', 'feature'])
+        
+        # Add commit on main
+        Path('file.txt').write_text('initial content\nmain line\n')
+        runner.invoke(cli, ['add', 'file.txt'])
+        result = runner.invoke(cli, ['commit', '-m', 'Add main line'])
+        
+        # Extract commit hash
+        match = _COMMIT_RE.search(result.output)
+        main_commit = match.group(1) if match else None
+        
+        # Switch to feature branch and make different changes
+        runner.invoke(cli, ['checkout', 'feature'])
+        Path('feature.txt').write_text('feature content\n')
+        runner.invoke(cli, ['add', 'feature.txt'])
+        runner.invoke(cli, ['commit', '-m', 'Add feature file'])
     
-    # Switch to feature branch and make different changes
-    runner.invoke(cli, ['checkout', 'feature'])
-    Path('feature.txt').write_text('feature content\n')
-    runner.invoke(cli, ['add', 'feature.txt'])
-    runner.invoke(cli, ['commit', '-m', 'Add feature file'])
+    return template, main_commit
+
+
+@pytest.fixture
+def repo_with_branches(_branches_template, tmp_path, monkeypatch):
+    """Create a repository with multiple branches and commits."""
+    template, main_commit = _branches_template
+    shutil.copytree(template, tmp_path, dirs_exist_ok=True)
+    monkeypatch.chdir(tmp_path)
     
     return {'path': tmp_path, 'main_commit': main_commit}
 
@@ -128,9 +136,9 @@ class TestCherryPickWithOptions:
 class TestCherryPickRefs:
     """Tests for cherry-pick with different ref formats."""
     
-    def test_cherry_pick_head_tilde(self, runner, tmp_path):
+    def test_cherry_pick_head_tilde(self, runner, tmp_path, monkeypatch):
         """Test cherry-pick with HEAD~N syntax."""
-        os.chdir(tmp_path)
+        monkeypatch.chdir(tmp_path)
         
         runner.invoke(cli, ['init'])
         runner.invoke(cli, ['config', 'set', 'user.name', 'Test'])
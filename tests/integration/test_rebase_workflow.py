@@ -2,17 +2,10 @@
 
 import os
 import pytest
-from click.testing import CliRunner
 
 from lit.cli.main import cli
 
 
-@pytest.fixture
-def runner():
-    """Create CLI runner."""
-    return CliRunner()
-
-
 @pytest.fixture
 def initialized_repo(runner, tmp_path):
     """Create an initialized repository with config."""
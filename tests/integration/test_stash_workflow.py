@@ -3,18 +3,11 @@
 import pytest
 import os
 from pathlib import Path
-from click.testing import CliRunner
 
 from lit.cli.main import cli
 from lit.core.repository import Repository
 
 
-@pytest.fixture
-def runner():
-    """Create CLI runner."""
-    return CliRunner()
-
-
 @pytest.fixture
 def initialized_repo(runner, tmp_path):
     """Create a repository with initial commit."""
@@ -0,0 +1,89 @@
+"""Unit tests for the commit-graph cache."""
+
+import pytest
+from lit.core.commit_graph import CommitGraph
+from tests.conftest import make_graph_commit
+
+
+def test_generation_numbers(repo):
+    """Test generations are one more than the highest parent generation."""
+    root = make_graph_commit(repo, [], 100)
+    left = make_graph_commit(repo, [root], 200)
+    right = make_graph_commit(repo, [make_graph_commit(repo, [root], 150)], 160)
+    merge = make_graph_commit(repo, [left, right], 300)
+    
+    graph = CommitGraph(repo)
+    assert graph.generation(root) == 1
+    assert graph.generation(left) == 2
+    assert graph.generation(right) == 3
+    assert graph.generation(merge) == 4
+    assert graph.parents(merge) == (left, right)
+    assert graph.commit_time(merge) == 300
+
+
+def test_save_and_reload(repo):
+    """Test saved entries are served without reading commit objects."""
+    root = make_graph_commit(repo, [], 100)
+    child = make_graph_commit(repo, [root], 200)
+    
+    graph = CommitGraph(repo)
+    graph.generation(child)
+    graph.save()
+    
+    reloaded = CommitGraph(repo)
+    repo.read_object = lambda h: pytest.fail("commit read from object store")
+    assert reloaded.parents(child) == (root,)
+    assert reloaded.generation(child) == 2
+    assert reloaded.commit_time(root) == 100
+
+
+def test_unknown_commit_not_cached(repo):
+    """Test unreadable commits report defaults and are not stored."""
+    graph = CommitGraph(repo)
+    missing = "0" * 40
+    assert graph.parents(missing) == ()
+    assert graph.generation(missing) == 0
+    graph.save()
+    assert not graph.path.exists()
+
+
+def test_commit_above_unreadable_parent_not_cached(repo):
+    """Test commits whose ancestry could not be read are not saved."""
+    root = make_graph_commit(repo, [], 100)
+    a = make_graph_commit(repo, [root], 200)
+    b = make_graph_commit(repo, [a], 300)
+    c = make_graph_commit(repo, [b], 400)
+    
+    real_read = repo.read_object
+    repo.read_object = lambda h: None if h == b else real_read(h)
+    graph = CommitGraph(repo)
+    graph.generation(c)
+    graph.save()
+    
+    # Once b can be read, c ranks above it
+    del repo.read_object
+    graph = CommitGraph(repo)
+    assert graph.generation(b) == 3
+    assert graph.generation(c) == 4
+
+
+def test_corrupt_file_is_ignored(repo):
+    """Test a damaged graph file is treated as empty."""
+    root = make_graph_commit(repo, [], 100)
+    (repo.lit_dir / CommitGraph.FILE_NAME).write_bytes(b"LCGR\x01\x00\x00\x00\x05\x00\x00\x00garbage")
+    assert CommitGraph(repo).generation(root) == 1
+
+
+def test_loaded_parent_hashes_are_shared(repo):
+    """Test a hash loaded from the file is one object across parent lists."""
+    root = make_graph_commit(repo, [], 100)
+    left = make_graph_commit(repo, [root], 200)
+    right = make_graph_commit(repo, [root], 300)
+    
+    graph = CommitGraph(repo)
+    graph.parents(left)
+    graph.parents(right)
+    graph.save()
+    
+    loaded = CommitGraph(repo)
+    assert loaded.parents(left)[0] is loaded.parents(right)[0]
@@ -192,6 +192,72 @@ def test_diff_working_to_index(repo_with_config):
     assert diffs[0].is_modified is True
 
 
+def test_diff_working_to_index_reuses_stat_cache(repo_with_config, monkeypatch):
+    """Test unchanged files are not re-hashed once their stat data is cached."""
+    import os
+    import lit.operations.diff as diff_module
+    
+    repo = repo_with_config
+    test_file = repo.work_tree / "test.txt"
+    test_file.write_text("hello")
+    repo.index.add_file(repo, test_file)
+    
+    # Age the file past the racy-timestamp window
+    old_time = test_file.stat().st_mtime - 60
+    os.utime(test_file, (old_time, old_time))
+    
+    calls = []
+    real_hash_file = diff_module.hash_file
+    monkeypatch.setattr(diff_module, "hash_file", lambda p: calls.append(p) or real_hash_file(p))
+    
+    assert DiffEngine(repo).diff_working_to_index() == []
+    assert (repo.lit_dir / "stat-cache.json").exists()
+    assert DiffEngine(repo).diff_working_to_index() == []
+    assert len(calls) == 1
+    
+    # Changing the file invalidates the entry
+    test_file.write_text("hello world")
+    diffs = DiffEngine(repo).diff_working_to_index()
+    assert len(diffs) == 1
+    assert len(calls) == 2
+
+
+def test_stat_cache_drops_deleted_paths(repo_with_config):
+    """Test entries for files that are gone are not saved again."""
+    import json
+    import os
+    
+    repo = repo_with_config
+    for name in ("keep.txt", "gone.txt"):
+        path = repo.work_tree / name
+        path.write_text(name)
+        repo.index.add_file(repo, path)
+        old_time = path.stat().st_mtime - 60
+        os.utime(path, (old_time, old_time))
+    
+    cache_file = repo.lit_dir / "stat-cache.json"
+    DiffEngine(repo).diff_working_to_index()
+    assert set(json.loads(cache_file.read_text())) == {"keep.txt", "gone.txt"}
+    
+    (repo.work_tree / "gone.txt").unlink()
+    DiffEngine(repo).diff_working_to_index()
+    assert set(json.loads(cache_file.read_text())) == {"keep.txt"}
+
+
+def test_walk_working_files_prunes_hidden(repo):
+    """Test working tree walk finds nested files and skips dot entries."""
+    (repo.work_tree / "src" / "pkg").mkdir(parents=True)
+    (repo.work_tree / "src" / "pkg" / "mod.py").write_text("x")
+    (repo.work_tree / ".hidden").mkdir()
+    (repo.work_tree / ".hidden" / "secret.txt").write_text("x")
+    (repo.work_tree / ".env").write_text("x")
+    (repo.work_tree / "top.txt").write_text("x")
+    
+    engine = DiffEngine(repo)
+    paths = {rel for rel, _ in engine._walk_working_files()}
+    assert paths == {"top.txt", str(Path("src", "pkg", "mod.py"))}
+
+
 def test_diff_index_to_head(repo_with_commits):
     """Test diffing index to HEAD."""
     repo = repo_with_commits
@@ -266,3 +332,199 @@ def test_format_diff_modified_file(repo):
     assert "+++ b/test.txt" in output
     assert "-hello" in output
     assert "+hello world" in output
+
+
+def test_file_diff_new_file_lines():
+    """Test whole-file hunks keep one prefixed, stripped line per input line."""
+    diff = FileDiff(path="test.txt", old_content=None, new_content=b"a  \r\nb\n\nc")
+    diff.compute_diff()
+    assert len(diff.hunks) == 1
+    assert diff.hunks[0].new_count == 4
+    assert diff.hunks[0].lines == ["+a", "+b", "+", "+c"]
+    
+    diff = FileDiff(path="test.txt", old_content=b"x\n", new_content=None)
+    diff.compute_diff()
+    assert diff.hunks[0].lines == ["-x"]
+
+
+def test_diff_commits_skips_unchanged_subtrees(repo):
+    """Test commit diff only reads subtrees whose hashes differ."""
+    from lit.core.objects import Commit
+    
+    def write_tree(entries):
+        tree = Tree()
+        for obj_type, obj_hash, name in entries:
+            tree.add_entry("040000" if obj_type == "tree" else "100644", obj_type, obj_hash, name)
+        return repo.write_object(tree)
+    
+    def write_commit(tree_hash, parents):
+        commit = Commit.create(tree_hash=tree_hash, parent_hashes=parents,
+                               author="A <a@b>", committer="A <a@b>", message="m")
+        return repo.write_object(commit)
+    
+    same = repo.write_object(Blob(b"same\n"))
+    old = repo.write_object(Blob(b"old\n"))
+    new = repo.write_object(Blob(b"new\n"))
+    
+    shared = write_tree([("blob", same, "a.txt")])
+    old_src = write_tree([("blob", old, "main.py"), ("blob", same, "gone.py")])
+    new_src = write_tree([("blob", new, "main.py"), ("tree", shared, "pkg")])
+    
+    first = write_commit(write_tree([("tree", shared, "docs"), ("tree", old_src, "src")]), [])
+    second = write_commit(write_tree([("tree", shared, "docs"), ("tree", new_src, "src")]), [first])
+    
+    engine = DiffEngine(repo)
+    read = []
+    real_read = repo.read_object
+    repo.read_object = lambda h: read.append(h) or real_read(h)
+    
+    diffs = engine.diff_commits(first, second)
+    assert [(d.path, d.is_new, d.is_deleted) for d in diffs] == [
+        ("src/gone.py", False, True),
+        ("src/main.py", False, False),
+        ("src/pkg/a.txt", True, False),
+    ]
+    # docs/ is identical on both sides and never opened; pkg/ is read once
+    assert read.count(shared) == 1
+
+
+def test_format_diff_streams_to_out(repo):
+    """Test streamed output matches the returned string."""
+    import io
+    
+    engine = DiffEngine(repo)
+    diffs = [
+        engine.diff_blobs("a.txt", b"one\ntwo\n", b"one\nthree\n"),
+        engine.diff_blobs("b.txt", None, b"new\n"),
+    ]
+    
+    for color in (False, True):
+        out = io.StringIO()
+        assert engine.format_diff(diffs, color=color, out=out) is None
+        assert out.getvalue() == engine.format_diff(diffs, color=color) + "\n"
+
+
+def test_diff_hunk_compact_lines():
+    """Test hunk lines round-trip through the compact buffer."""
+    hunk = DiffHunk(1, 2, 1, 2)
+    assert hunk.lines == []
+    
+    hunk.add_line(" same")
+    hunk.add_line("-café")
+    hunk.add_line("+")
+    assert hunk.lines == [" same", "-café", "+"]
+    assert hunk.text == " same\n-café\n+"
+    
+    hunk.lines = ["+only"]
+    assert hunk.lines == ["+only"]
+    assert not hasattr(hunk, "__dict__")
+
+
+def test_get_tree_files_memoized_by_hash(repo):
+    """Test shared subtrees are read once and results are safe to modify."""
+    blob = repo.write_object(Blob(b"x"))
+    sub = Tree()
+    sub.add_entry("100644", "blob", blob, "f.txt")
+    sub_hash = repo.write_object(sub)
+    root = Tree()
+    root.add_entry("040000", "tree", sub_hash, "a")
+    root.add_entry("040000", "tree", sub_hash, "b")
+    
+    engine = DiffEngine(repo)
+    read = []
+    real_read = repo.read_object
+    repo.read_object = lambda h: read.append(h) or real_read(h)
+    
+    files = engine._get_tree_files(root)
+    assert files == {"a/f.txt": blob, "b/f.txt": blob}
+    assert read == [sub_hash]
+    
+    files.clear()
+    assert engine._get_tree_files(root) == {"a/f.txt": blob, "b/f.txt": blob}
+    assert engine._get_tree_files(sub, "p/") == {"p/f.txt": blob}
+    assert read == [sub_hash]
+
+
+def test_binary_file_diff(repo):
+    """Test binary content skips line diffing and is reported as differing."""
+    engine = DiffEngine(repo)
+    diff = engine.diff_blobs("img.png", b"\x89PNG\0\x01", b"\x89PNG\0\x02")
+    assert diff.is_binary is True
+    assert diff.hunks == []
+    
+    output = engine.format_diff([diff], color=False)
+    assert "Binary files a/img.png and b/img.png differ" in output
+    assert "---" not in output
+    
+    diff = engine.diff_blobs("img.png", None, b"\0data")
+    output = engine.format_diff([diff], color=False)
+    assert "new file mode 100644" in output
+    assert "Binary files /dev/null and b/img.png differ" in output
+    
+    assert engine.diff_blobs("a.txt", b"text\n", b"more text\n").is_binary is False
+
+
+def test_diff_trees_parallel_keeps_order(repo):
+    """Test many changed files are diffed in path order."""
+    old_files = {}
+    new_files = {}
+    for i in range(20):
+        old_files[f"f{i:02}.txt"] = repo.write_object(Blob(f"old {i}\n".encode()))
+        new_files[f"f{i:02}.txt"] = repo.write_object(Blob(f"new {i}\n".encode()))
+    
+    diffs = DiffEngine(repo).diff_trees(old_files, new_files)
+    assert [d.path for d in diffs] == sorted(new_files)
+    assert all(d.hunks[0].lines == [f"-old {i}", f"+new {i}"] for i, d in enumerate(diffs))
+
+
+def test_modified_file_diff_keeps_raw_bytes():
+    """Test modified-file hunks are built from raw lines, decoding only on output."""
+    diff = FileDiff(path="t.txt", old_content=b"keep\n\xffold\n", new_content=b"keep\nnew \n")
+    diff.compute_diff()
+    assert diff.hunks[0]._buf == bytearray(b" keep\n-\xffold\n+new")
+    assert diff.hunks[0].lines == [" keep", "-�old", "+new"]
+    
+    # A missing final newline is still a change
+    diff = FileDiff(path="t.txt", old_content=b"a\n", new_content=b"a")
+    diff.compute_diff()
+    assert len(diff.hunks) == 1
+
+
+def test_compute_diff_identical_content_skips_split():
+    """Test identical contents return before any line splitting."""
+    class Content(bytes):
+        def splitlines(self, *args, **kwargs):
+            raise AssertionError("content should not be split")
+    
+    diff = FileDiff(path="t.txt", old_content=Content(b"same\n"), new_content=Content(b"same\n"))
+    diff.compute_diff()
+    assert diff.hunks == []
+
+
+def test_diff_working_to_index_does_not_swallow_interrupts(repo_with_config, monkeypatch):
+    """Test only I/O errors are ignored while hashing working files."""
+    repo = repo_with_config
+    test_file = repo.work_tree / "test.txt"
+    test_file.write_text("hello")
+    repo.index.add_file(repo, test_file)
+    
+    engine = DiffEngine(repo)
+    monkeypatch.setattr(engine, "_hash_working_file", lambda *args: (_ for _ in ()).throw(KeyboardInterrupt))
+    with pytest.raises(KeyboardInterrupt):
+        engine.diff_working_to_index()
+    
+    # An unreadable file falls through to a content comparison
+    monkeypatch.setattr(engine, "_hash_working_file", lambda *args: (_ for _ in ()).throw(OSError))
+    assert engine.diff_working_to_index() == []
+
+
+def test_diff_commits_initial_commit(repo_with_commits):
+    """Test the first commit shows every file as added."""
+    repo = repo_with_commits
+    engine = DiffEngine(repo)
+    
+    head = repo.refs.resolve_head()
+    first = repo.read_object(head).parents[0]
+    diffs = engine.diff_commits(None, first)
+    assert [(d.path, d.is_new) for d in diffs] == [("file1.txt", True)]
+    assert diffs[0].hunks[0].lines == ["+Hello, World!"]
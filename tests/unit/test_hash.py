@@ -54,3 +54,18 @@ def test_hash_file_deterministic():
         assert hash1 == hash2
     finally:
         Path(temp_path).unlink()
+
+
+@pytest.mark.parametrize("size", [0, 1000, 300 * 1024])
+def test_hash_file_matches_hash_object(size):
+    """Test small, empty and memory-mapped files hash like their bytes."""
+    import os
+    data = os.urandom(size)
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(data)
+        temp_path = f.name
+    
+    try:
+        assert hash_file(temp_path) == hash_object(data)
+    finally:
+        Path(temp_path).unlink()
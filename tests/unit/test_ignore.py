@@ -25,6 +25,8 @@ class TestIgnorePattern:
         assert pattern.matches("temp/sub/file.txt")
         # Should match temp itself as a directory
         assert pattern.matches("temp", is_dir=True)
+        assert pattern.matches("a/b/temp/c/d/file.txt")
+        assert not pattern.matches("a/temporary/file.txt")
     
     def test_negation_pattern(self):
         """Test negation patterns."""
@@ -53,6 +55,21 @@ class TestIgnorePattern:
         assert pattern.matches("testa.txt")
         assert not pattern.matches("test.txt")
         assert not pattern.matches("test12.txt")
+    
+    def test_character_class_pattern(self):
+        """Test character classes, negated classes and unclosed brackets."""
+        pattern = IgnorePattern("file[0-9].txt")
+        assert pattern.matches("file1.txt")
+        assert not pattern.matches("filex.txt")
+        
+        negated = IgnorePattern("[!]a]x")
+        assert negated.matches("bx")
+        assert not negated.matches("ax")
+        assert not negated.matches("]x")
+        
+        unclosed = IgnorePattern("a[b")
+        assert unclosed.matches("a[b")
+        assert not unclosed.matches("ab")
 
 
 class TestIgnoreMatcher:
@@ -131,6 +148,56 @@ class TestIgnoreMatcher:
         assert "file.txt" in filtered
         assert "src/main.py" in filtered
         assert "test.log" not in filtered
+    
+    def test_compiled_patterns_shared_between_matchers(self):
+        """Test matchers built separately reuse the same compiled regex."""
+        first = IgnoreMatcher()
+        second = IgnoreMatcher()
+        first.add_pattern("*.cache")
+        second.add_pattern("*.cache")
+        
+        assert first.patterns[0]._regex is second.patterns[0]._regex
+        assert not hasattr(first.patterns[0], "__dict__")
+    
+    def test_last_match_wins_with_fused_patterns(self):
+        """Test ordering between ignore and negation patterns is kept."""
+        matcher = IgnoreMatcher()
+        matcher.add_patterns(["*.log", "!keep.log", "logs/", "!logs/keep.log", "logs/keep.log"])
+        
+        assert matcher.is_ignored("debug.log")
+        assert not matcher.is_ignored("keep.log")
+        assert matcher.is_ignored("logs/app.txt")
+        assert matcher.is_ignored("logs/keep.log")
+        assert not matcher.is_ignored("src/main.py")
+        
+        matcher.add_pattern("!logs/keep.log")
+        assert not matcher.is_ignored("logs/keep.log")
+    
+    def test_files_below_ignored_directory_skip_search(self):
+        """Test a directory verdict decides the files below it."""
+        matcher = IgnoreMatcher()
+        matcher.add_pattern("node_modules/")
+        
+        assert matcher.is_ignored("node_modules/a/index.js")
+        assert matcher._dir_cache["node_modules/a"] is True
+        assert matcher.is_ignored("node_modules/a/other.js")
+        assert not matcher.is_ignored("src/index.js")
+        
+        matcher.add_pattern("!node_modules/a/keep.js")
+        assert matcher._dir_cache == {}
+        assert not matcher.is_ignored("node_modules/a/keep.js")
+    
+    def test_results_cached_by_path_only(self):
+        """Test a path asked as file and as directory shares one cache entry."""
+        matcher = IgnoreMatcher()
+        matcher.add_pattern("build/")
+        matcher.add_pattern("*.log")
+        
+        assert matcher.is_ignored("build", is_dir=True)
+        assert matcher.is_ignored("build", is_dir=False)
+        assert not matcher.is_ignored("src", is_dir=True)
+        assert not matcher.is_ignored("src")
+        assert matcher._cache.cache_info().currsize == 2
 
 
 class TestGetIgnoreMatcher:
@@ -208,6 +208,24 @@ def test_index_multiple_files(temp_repo):
     assert index.get_entry('file3.txt') is not None
 
 
+def test_index_add_files(temp_repo):
+    """Test staging several files writes the index once with every entry."""
+    (temp_repo.work_tree / 'file1.txt').write_text('Content 1')
+    (temp_repo.work_tree / 'file2.txt').write_text('Content 2')
+    
+    index = Index()
+    hashes = index.add_files(temp_repo, ['file1.txt', 'file2.txt'])
+    
+    on_disk = Index()
+    on_disk.read(str(temp_repo.index_file))
+    assert list(on_disk.entries) == ['file1.txt', 'file2.txt']
+    
+    single = Index()
+    assert hashes == [single.add_file(temp_repo, 'file1.txt'),
+                      single.add_file(temp_repo, 'file2.txt')]
+    assert index.entries == single.entries
+
+
 def test_index_update_existing_entry():
     """Test updating existing entry."""
     index = Index()
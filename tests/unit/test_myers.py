@@ -0,0 +1,196 @@
+"""Unit tests for the Myers diff algorithm."""
+
+import pytest
+from lit.operations.myers import myers_diff, bounded_myers_diff, group_opcodes
+
+
+def apply_opcodes(a, b, opcodes):
+    """Rebuild b from a using the opcodes."""
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            result.extend(b[j1:j2])
+    return result
+
+
+@pytest.mark.parametrize("a, b", [
+    ([], []),
+    ([], ['x']),
+    (['x'], []),
+    (['a', 'b', 'c'], ['a', 'b', 'c']),
+    (['a', 'b', 'c'], ['a', 'x', 'c']),
+    (['a', 'b', 'c', 'a', 'b', 'b', 'a'], ['c', 'b', 'a', 'b', 'a', 'c']),
+    (['a', 'u1', 'b', 'c'], ['a', 'b', 'v1', 'c', 'v2']),
+    (['u1', 'u2'], ['v1', 'v2', 'v3']),
+])
+def test_myers_diff_reconstructs_target(a, b):
+    """Test opcodes cover both sequences and rebuild the new one."""
+    opcodes = myers_diff(a, b)
+    assert apply_opcodes(a, b, opcodes) == b
+    if opcodes:
+        assert opcodes[-1][2] == len(a)
+        assert opcodes[-1][4] == len(b)
+
+
+def test_myers_diff_is_minimal():
+    """Test classic example needs 5 edits (Myers 1986)."""
+    a = list('ABCABBA')
+    b = list('CBABAC')
+    opcodes = myers_diff(a, b)
+    edits = sum((i2 - i1) + (j2 - j1) for tag, i1, i2, j1, j2 in opcodes if tag != 'equal')
+    assert edits == 5
+
+
+def test_myers_diff_minimal_with_unique_lines():
+    """Test lines unique to one side do not break matching runs or minimality."""
+    import random
+    
+    rng = random.Random(7)
+    for _ in range(50):
+        a = [rng.choice('abcdefgh') for _ in range(rng.randint(0, 25))]
+        b = [rng.choice('abcdxyz') for _ in range(rng.randint(0, 25))]
+        opcodes = myers_diff(a, b)
+        assert apply_opcodes(a, b, opcodes) == b
+        
+        matched = sum(i2 - i1 for tag, i1, i2, j1, j2 in opcodes if tag == 'equal')
+        lcs = _lcs_length(a, b)
+        assert matched == lcs
+        
+        # Adjacent equal opcodes would mean a run was split needlessly
+        tags = [op[0] for op in opcodes]
+        assert ('equal', 'equal') not in zip(tags, tags[1:])
+
+
+def _lcs_length(a, b):
+    """Longest common subsequence length by dynamic programming."""
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return prev[-1]
+
+
+def test_myers_diff_over_cost_cap_falls_back_to_difflib(monkeypatch):
+    """Test changes over the edit cost cap are matched by SequenceMatcher."""
+    from difflib import SequenceMatcher
+    import lit.operations.myers as myers
+    
+    monkeypatch.setattr(myers, "MAX_EDIT_COST", 2)
+    a = list('ABCABBA')
+    b = list('CBABAC')
+    
+    assert bounded_myers_diff(a, b) is None
+    assert myers_diff(a, b) == SequenceMatcher(None, a, b).get_opcodes()
+    # Cheap enough changes still get the minimal diff
+    assert bounded_myers_diff(['a', 'b'], ['a', 'c']) == [('equal', 0, 1, 0, 1), ('replace', 1, 2, 1, 2)]
+
+
+def test_myers_diff_identical_is_single_equal():
+    """Test identical input produces one equal opcode."""
+    assert myers_diff(['a', 'b'], ['a', 'b']) == [('equal', 0, 2, 0, 2)]
+
+
+def test_group_opcodes_splits_distant_changes():
+    """Test changes far apart land in separate hunks."""
+    a = [f"line{i}\n" for i in range(20)]
+    b = list(a)
+    b[1] = "changed\n"
+    b[18] = "changed\n"
+    groups = group_opcodes(myers_diff(a, b))
+    assert len(groups) == 2
+
+
+def test_group_opcodes_no_changes():
+    """Test no hunks for identical sequences."""
+    assert group_opcodes(myers_diff(['a'], ['a'])) == []
+
+
+@pytest.mark.parametrize("max_cost", [100, 2])
+def test_int32_trace_matches_python_trace(max_cost):
+    """Test the numba kernel's source records the same trace as _trace."""
+    np = pytest.importorskip("numpy")
+    from lit.operations import myers
+    
+    a = list('ABCABBA')
+    b = list('CBABAC')
+    ids_a, ids_b = myers._intern(a, b)
+    trace = myers._trace_int32(np.asarray(ids_a, dtype=np.int32), np.asarray(ids_b, dtype=np.int32), max_cost)
+    expected = myers._trace(a, b, max_cost)
+    assert list(trace) == (list(expected) if expected is not None else [])
+
+
+def test_jit_kernel_compiled_lazily(monkeypatch):
+    """Test small diffs never build the kernel and large ones compile it once."""
+    from lit.operations import myers
+    
+    calls = []
+    monkeypatch.setattr(myers, "_jit_kernel", lambda: calls.append(1))
+    monkeypatch.setattr(myers, "JIT_MIN_LINES", 6)
+    
+    myers_diff(list('ab'), list('ba'))
+    assert calls == []
+    
+    # No kernel available: the Python search runs instead
+    a = list('ABCABBA')
+    b = list('CBABAC')
+    assert apply_opcodes(a, b, myers_diff(a, b)) == b
+    assert calls == [1]
+
+
+def test_jit_kernel_warns_once_without_numba(monkeypatch):
+    """Test falling back to the Python search is reported once."""
+    import warnings
+    from lit.operations import myers
+    
+    monkeypatch.setattr(myers, "njit", None)
+    monkeypatch.setattr(myers, "_jit_trace", None)
+    monkeypatch.setattr(myers, "_jit_warned", False)
+    
+    with pytest.warns(ImportWarning, match="numba"):
+        assert myers._jit_kernel() is None
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert myers._jit_kernel() is None
+
+
+def test_jit_kernel_matches_python_trace():
+    """Test the compiled kernel records the same trace as the Python one."""
+    pytest.importorskip("numba")
+    import numpy as np
+    from lit.operations import myers
+    
+    a = list('ABCABBA')
+    b = list('CBABAC')
+    ids_a, ids_b = myers._intern(a, b)
+    jit_trace = myers._jit_kernel()(np.asarray(ids_a, dtype=np.int32), np.asarray(ids_b, dtype=np.int32), 100)
+    assert list(jit_trace) == list(myers._trace(a, b, 100))
+
+
+def test_myers_diff_trims_common_prefix_and_suffix(monkeypatch):
+    """Test only the changed middle region is searched."""
+    import lit.operations.myers as myers
+    
+    searched = []
+    real_search = myers._search_blocks
+    monkeypatch.setattr(myers, "_search_blocks", lambda a, b: searched.append((a, b)) or real_search(a, b))
+    
+    a = [f"line{i}" for i in range(100)]
+    b = a[:40] + ["new1", "new2"] + a[45:]
+    assert myers_diff(a, b) == [
+        ('equal', 0, 40, 0, 40),
+        ('replace', 40, 45, 40, 42),
+        ('equal', 45, 100, 42, 97),
+    ]
+    assert searched == [(a[40:45], ["new1", "new2"])]
+    
+    # Pure insertion needs no search at all
+    searched.clear()
+    assert myers_diff(['a', 'c'], ['a', 'b', 'c']) == [
+        ('equal', 0, 1, 0, 1), ('insert', 1, 1, 1, 2), ('equal', 1, 2, 2, 3)
+    ]
+    assert searched == []
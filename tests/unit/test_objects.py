@@ -57,3 +57,11 @@ def test_blob_from_file():
         assert blob.data == b'file content'
     finally:
         Path(temp_path).unlink()
+
+
+def test_blob_header_and_data():
+    """Test stored bytes carry the header and match the cached hash."""
+    blob = Blob(b'hello')
+    hash_value, content = blob._header_and_data()
+    assert content == b'blob 5\0hello'
+    assert hash_value == blob.hash
@@ -29,6 +29,21 @@ def test_get_current_branch_detached(repo):
     assert refs.get_current_branch() is None
 
 
+def test_head_state(repo, sample_commit):
+    """Test head_state returns the branch and commit, or None for detached."""
+    refs = RefManager(repo)
+    commit_hash = repo.write_object(sample_commit)
+    refs.create_branch("main", commit_hash)
+    
+    repo.head_file.write_text("ref: refs/heads/main\n")
+    assert refs.head_state() == ("main", commit_hash)
+    
+    repo.head_file.write_text(commit_hash + "\n")
+    assert refs.head_state() == (None, commit_hash)
+    
+    repo.head_file.unlink()
+    assert refs.head_state() == (None, None)
+
 def test_is_detached_head(repo):
     """Test detecting detached HEAD state."""
     refs = RefManager(repo)
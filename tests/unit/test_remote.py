@@ -178,6 +178,42 @@ def test_clone_checks_out_default_branch(temp_dir, repo_with_commits):
     assert (dest_path / "file2.txt").exists()
 
 
+def test_clone_populates_index_for_nested_files(temp_dir, repo_with_commits):
+    """Test that clone writes nested files and indexes them with full paths."""
+    source = repo_with_commits
+    (source.work_tree / "src").mkdir()
+    nested = source.work_tree / "src" / "app.py"
+    nested.write_text("print('hi')\n")
+    source.index.add_file(source, nested)
+    make_commit(source, "Add nested file")
+    
+    dest_path = temp_dir / "cloned"
+    temp_repo = Repository(str(temp_dir))
+    cloned = temp_repo.remote.clone(str(source.work_tree), str(dest_path))
+    
+    assert (dest_path / "src" / "app.py").read_text() == "print('hi')\n"
+    index = Index()
+    index.read(str(cloned.index_file))
+    assert set(index.entries) == {"file1.txt", "file2.txt", "src/app.py"}
+    assert index.entries["src/app.py"].size == len("print('hi')\n")
+
+
+def test_checkout_commit_clears_nested_directories(repo_with_commits):
+    """Test that checkout removes untracked nested directories but keeps .lit."""
+    repo = repo_with_commits
+    deep = repo.work_tree / "build" / "out" / "tmp"
+    deep.mkdir(parents=True)
+    (deep / "artifact.o").write_bytes(b"\0")
+    (repo.work_tree / "build" / "log.txt").write_text("log")
+    
+    commit = repo.read_object(repo.refs.resolve_head())
+    repo.remote._checkout_commit(repo, commit)
+    
+    assert not (repo.work_tree / "build").exists()
+    assert repo.lit_dir.is_dir()
+    assert (repo.work_tree / "file1.txt").exists()
+
+
 def test_clone_copies_branches(temp_dir, repo_with_commits):
     """Test that clone copies branch references."""
     source = repo_with_commits
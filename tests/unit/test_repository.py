@@ -1,6 +1,7 @@
 """Repository initialization tests."""
 
 import pytest
+import os
 import tempfile
 import shutil
 from pathlib import Path
@@ -87,3 +88,135 @@ def test_find_repository_none():
     with tempfile.TemporaryDirectory() as temp_dir:
         found_repo = Repository.find_repository(temp_dir)
         assert found_repo is None
+
+
+def test_read_large_blob(temp_repo):
+    """Test blob larger than one read chunk round-trips intact."""
+    temp_repo.init()
+    data = os.urandom(300 * 1024) + b'\0tail'
+    hash_value = temp_repo.write_object(Blob(data))
+    
+    read_blob = temp_repo.read_object(hash_value)
+    assert read_blob.data == data
+
+
+def test_object_exists_does_not_scan(temp_repo):
+    """Test single checks see objects added elsewhere without a full scan."""
+    temp_repo.init()
+    assert not temp_repo.object_exists('0' * 40)
+    
+    hash_value = temp_repo.write_object(Blob(b'indexed'))
+    assert temp_repo.object_exists(hash_value)
+    
+    # Object written through a different instance
+    other = Repository(str(temp_repo.work_tree))
+    other_hash = other.write_object(Blob(b'written elsewhere'))
+    assert temp_repo.object_exists(other_hash)
+    assert temp_repo._object_index is None
+
+
+def test_missing_objects_scans_once(temp_repo, monkeypatch):
+    """Test batch checks trust one scan and ignore temporary files."""
+    temp_repo.init()
+    stored = temp_repo.write_object(Blob(b'stored'))
+    missing = '0' * 40
+    object_dir = temp_repo.object_path(stored).parent
+    (object_dir / 'tmpabc123.tmp').write_bytes(b'partial')
+    
+    monkeypatch.setattr(Repository, "object_path", lambda self, h: pytest.fail("object stat()ed"))
+    assert temp_repo.missing_objects([stored, missing]) == [missing]
+    assert temp_repo.stored_objects() == {stored}
+
+
+def test_read_objects_bulk(temp_repo):
+    """Test bulk read returns each readable object once."""
+    temp_repo.init()
+    hashes = [temp_repo.write_object(Blob(f'blob {i}'.encode())) for i in range(5)]
+    missing = '0' * 40
+    
+    objects = temp_repo.read_objects_bulk(hashes + hashes[:2] + [missing])
+    assert set(objects) == set(hashes)
+    assert objects[hashes[3]].data == b'blob 3'
+
+
+@pytest.mark.parametrize("size", [0, 1000, 3 * 1024 * 1024 + 7])
+def test_write_blob_file_matches_write_object(temp_repo, size):
+    """Test small and streamed files are stored exactly like in-memory blobs."""
+    temp_repo.init()
+    data = os.urandom(size)
+    filepath = Path(temp_repo.work_tree) / "file.bin"
+    filepath.write_bytes(data)
+    
+    sha = temp_repo.write_blob_file(str(filepath))
+    
+    assert sha == Blob(data).hash
+    assert temp_repo.read_object(sha).data == data
+    assert not list(temp_repo.object_path(sha).parent.glob("*.tmp"))
+    assert temp_repo.write_blob_file(str(filepath)) == sha
+
+
+def test_identical_blobs_probe_disk_once(temp_repo, monkeypatch):
+    """Test writing the same content again skips the object store probe."""
+    temp_repo.init()
+    for name in ("a.txt", "b.txt"):
+        (Path(temp_repo.work_tree) / name).write_bytes(b"same content")
+    
+    probes = []
+    real_object_path = Repository.object_path
+    monkeypatch.setattr(Repository, "object_path",
+                        lambda self, hash: probes.append(hash) or real_object_path(self, hash))
+    
+    first = temp_repo.write_blob_file(str(Path(temp_repo.work_tree) / "a.txt"))
+    probe_count = len(probes)
+    assert temp_repo.write_blob_file(str(Path(temp_repo.work_tree) / "b.txt")) == first
+    assert len(probes) == probe_count
+
+
+def test_write_objects_bulk(temp_repo):
+    """Test bulk writes return hashes in order and store each object once."""
+    temp_repo.init()
+    blobs = [Blob(b"one"), Blob(b"two"), Blob(b"one")]
+    stored = temp_repo.write_object(Blob(b"two"))
+    
+    hashes = temp_repo.write_objects_bulk(blobs)
+    
+    assert hashes == [blob.hash for blob in blobs]
+    assert hashes[1] == stored
+    for sha, blob in zip(hashes, blobs):
+        assert temp_repo.read_object(sha).data == blob.data
+
+
+def test_write_objects_bulk_serializes_once(temp_repo, monkeypatch):
+    """Test bulk writes serialize each new object once and stored ones not at all."""
+    temp_repo.init()
+    stored = Blob(b"stored")
+    temp_repo.write_object(stored)
+    
+    calls = []
+    real_serialize = Blob.serialize
+    monkeypatch.setattr(Blob, "serialize", lambda self: calls.append(self) or real_serialize(self))
+    
+    new = Blob(b"new")
+    temp_repo.write_objects_bulk([new, stored])
+    
+    assert calls == [new]
+
+
+def test_read_object_inflates_into_one_buffer(temp_repo):
+    """Test reading a large blob does not hold a second copy of its content."""
+    import tracemalloc
+    
+    temp_repo.init()
+    data = b''.join(b'line %d\n' % i for i in range(300000))
+    hash_value = temp_repo.write_object(Blob(data))
+    
+    tracemalloc.start()
+    try:
+        blob = temp_repo.read_object(hash_value)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    
+    assert blob.data == data
+    assert isinstance(blob.data, bytes)
+    assert peak < 1.5 * len(data)
@@ -0,0 +1,175 @@
+"""Unit tests for stash operations."""
+
+import pytest
+from pathlib import Path
+from lit.core.objects import Blob
+from lit.core.repository import Repository
+from lit.operations import stash as stash_module
+from lit.operations.stash import StashManager
+from tests.conftest import make_commit
+
+
+@pytest.fixture
+def stash_repo(repo_with_config, monkeypatch):
+    """Repository with a committed nested tree and no racy window."""
+    repo = repo_with_config
+    monkeypatch.setattr(stash_module, "RACY_WINDOW_NS", -10**12)
+    for path, content in {"a/x.txt": "x", "a/y.txt": "y", "b/z.txt": "z", "top.txt": "t"}.items():
+        full_path = repo.work_tree / path
+        full_path.parent.mkdir(exist_ok=True)
+        full_path.write_text(content)
+        repo.index.add_file(repo, full_path)
+    make_commit(repo, "Initial")
+    return repo
+
+
+def _count_blob_reads(monkeypatch):
+    """Record the paths written as blobs from the working tree."""
+    read = []
+    real_write_blob_file = Repository.write_blob_file
+    monkeypatch.setattr(Repository, "write_blob_file",
+                        lambda self, path: read.append(path) or real_write_blob_file(self, path))
+    return read
+
+
+def test_workdir_tree_reuses_unchanged_directories(stash_repo, monkeypatch):
+    """Test a rebuild only reads files in directories whose stat data changed."""
+    first = StashManager(stash_repo)._build_tree_from_workdir()
+    assert first == stash_repo.read_object(stash_repo.refs.resolve_head()).tree
+    
+    read = _count_blob_reads(monkeypatch)
+    assert StashManager(stash_repo)._build_tree_from_workdir() == first
+    assert read == []
+    
+    (stash_repo.work_tree / "a" / "x.txt").write_text("changed")
+    changed = StashManager(stash_repo)._build_tree_from_workdir()
+    assert changed != first
+    # Only the changed directory and the root above it are rebuilt
+    read_paths = sorted(Path(p).relative_to(stash_repo.work_tree).as_posix() for p in read)
+    assert read_paths == ["a/x.txt", "a/y.txt", "top.txt"]
+
+
+def test_workdir_tree_not_cached_for_racy_files(stash_repo, monkeypatch):
+    """Test directories with just-modified files are always rehashed."""
+    monkeypatch.setattr(stash_module, "RACY_WINDOW_NS", 10**12)
+    StashManager(stash_repo)._build_tree_from_workdir()
+    
+    read = _count_blob_reads(monkeypatch)
+    StashManager(stash_repo)._build_tree_from_workdir()
+    assert len(read) == 4
+
+
+@pytest.mark.parametrize("threshold", [0, 1000])
+def test_workdir_tree_serial_and_parallel_agree(stash_repo, monkeypatch, threshold):
+    """Test blobs written on the thread pool build the same tree."""
+    monkeypatch.setattr(stash_module, "PARALLEL_HASH_THRESHOLD", threshold)
+    (stash_repo.work_tree / "b" / "z.txt").write_text("new z")
+    
+    tree_hash = StashManager(stash_repo)._build_tree_from_workdir()
+    files = StashManager(stash_repo)._get_tree_files(tree_hash)
+    assert files["b/z.txt"] == Blob(b"new z").hash
+    assert sorted(files) == ["a/x.txt", "a/y.txt", "b/z.txt", "top.txt"]
+
+
+def test_tree_files_memoized_per_tree(stash_repo, monkeypatch):
+    """Test a tree listed repeatedly is read from the object store once."""
+    manager = StashManager(stash_repo)
+    head_tree = stash_repo.read_object(stash_repo.refs.resolve_head()).tree
+    
+    read = []
+    real_read = stash_repo.read_object
+    monkeypatch.setattr(stash_repo, "read_object", lambda h: read.append(h) or real_read(h))
+    
+    files = manager._get_tree_files(head_tree)
+    assert sorted(files) == ["a/x.txt", "a/y.txt", "b/z.txt", "top.txt"]
+    assert len(read) == 3
+    
+    files["extra"] = "0" * 40
+    assert manager._get_tree_files(head_tree, "p") == {
+        f"p/{path}": sha1 for path, sha1 in manager._tree_files(head_tree).items()
+    }
+    assert "extra" not in manager._tree_files(head_tree)
+    assert len(read) == 3
+
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_stash_file_round_trip(stash_repo, monkeypatch, use_orjson):
+    """Test stash entries survive a save and load with either JSON backend."""
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(stash_module, "orjson", None)
+    
+    manager = StashManager(stash_repo)
+    entry = stash_module.StashEntry("WIP on main: é", "main", "a" * 40, 123, "b" * 40, "c" * 40)
+    manager._save_stashes([entry, entry])
+    
+    assert manager._load_stashes() == [entry, entry]
+    
+    manager.stash_file.write_bytes(b"{not json")
+    assert manager._load_stashes() == []
+
+
+def test_make_parent_dirs_once_per_directory(stash_repo, monkeypatch):
+    """Test restoring many files creates each directory once."""
+    import os
+    made = []
+    real_makedirs = os.makedirs
+    monkeypatch.setattr(os, "makedirs", lambda path, exist_ok=False: made.append(path) or real_makedirs(path, exist_ok=exist_ok))
+    
+    StashManager(stash_repo)._make_parent_dirs(["top.txt", "n/a.txt", "n/b.txt", "n/m/c.txt"])
+    
+    assert [Path(p).relative_to(stash_repo.work_tree).as_posix() for p in made] == ["n", "n/m"]
+    assert (stash_repo.work_tree / "n" / "m").is_dir()
+
+
+def test_index_tree_reused_while_index_unchanged(stash_repo, monkeypatch):
+    """Test the index tree is only rebuilt after the index file changes."""
+    head_tree = stash_repo.read_object(stash_repo.refs.resolve_head()).tree
+    assert StashManager(stash_repo)._build_tree_from_index() == head_tree
+    
+    monkeypatch.setattr(StashManager, "_write_index_tree", lambda self, index: pytest.fail("index tree rebuilt"))
+    assert StashManager(stash_repo)._build_tree_from_index() == head_tree
+    monkeypatch.undo()
+    monkeypatch.setattr(stash_module, "RACY_WINDOW_NS", -10**12)
+    
+    (stash_repo.work_tree / "top.txt").write_text("staged")
+    stash_repo.index.add_file(stash_repo, stash_repo.work_tree / "top.txt")
+    stash_repo.index.write(str(stash_repo.index_file))
+    assert StashManager(stash_repo)._build_tree_from_index() != head_tree
+
+
+def test_index_tree_matches_commit_tree_for_nested_dirs(stash_repo):
+    """Test the index tree equals the committed tree across several levels."""
+    for path in ["d/e/f/deep.txt", "d/e/mid.txt", "d/only/leaf.txt", "a/x2.txt"]:
+        full_path = stash_repo.work_tree / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(path)
+        stash_repo.index.add_file(stash_repo, full_path)
+    make_commit(stash_repo, "Nested")
+    
+    head_tree = stash_repo.read_object(stash_repo.refs.resolve_head()).tree
+    assert StashManager(stash_repo)._write_index_tree(stash_repo.index) == head_tree
+
+
+def test_stash_entry_to_dict_covers_every_field():
+    """Test the explicit to_dict keeps every field and entries are immutable."""
+    import dataclasses
+    entry = stash_module.StashEntry("msg", "main", "a" * 40, 123, "b" * 40, "c" * 40)
+    
+    assert entry.to_dict() == dataclasses.asdict(entry)
+    assert stash_module.StashEntry.from_dict(entry.to_dict()) == entry
+    assert not hasattr(entry, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        entry.message = "changed"
+
+
+def test_index_tree_reused_for_rewritten_identical_index(stash_repo, monkeypatch):
+    """Test an index rewritten with the same rows reuses the tree by fingerprint."""
+    monkeypatch.setattr(stash_module, "RACY_WINDOW_NS", 10**12)
+    head_tree = stash_repo.read_object(stash_repo.refs.resolve_head()).tree
+    assert StashManager(stash_repo)._build_tree_from_index() == head_tree
+    
+    stash_repo.index.write(str(stash_repo.index_file))
+    monkeypatch.setattr(StashManager, "_write_index_tree", lambda self, index: pytest.fail("index tree rebuilt"))
+    assert StashManager(stash_repo)._build_tree_from_index() == head_tree